@@ -7,15 +7,11 @@
 # Description:
 
 
-from flask import jsonify
-from FuturePathAPI.initApp import app, END_POINT
+from flask import jsonify, Blueprint
+from FuturePathAPI.initApp import END_POINT
 
 
-# These imports are unused by serve to activate other Flask App routes
-from FuturePathAPI import authentication
-from FuturePathAPI import user
-from FuturePathAPI import tasks
-from FuturePathAPI import Rolling
+blueprint = Blueprint('main', __name__)
 
 
 options = [
@@ -50,7 +46,7 @@ options = [
 ]
 
 
-@app.route('/', methods=['GET'])
+@blueprint.route('/', methods=['GET'])
 def index():
     """
     :OPTIONS: GET
@@ -66,7 +62,8 @@ def main():
         This should NOT be called even when debuging. Use run.py instead.
     :return:
     """
-    app.run(port=8000, debug=True)
+    from FuturePathAPI.initApp import create_app
+    create_app().run(port=8000, debug=True)
     # socketio.run(app)
 
 
@@ -11,14 +11,24 @@ import traceback
 import json
 import functools
 import re
-from flask import jsonify, abort, request, render_template, Response
-from numpy.random import choice
-from itertools import product
+import time
+import threading
+import numpy
+from flask import jsonify, abort, request, render_template, Response, stream_with_context, Blueprint
 from collections.abc import Iterable
-from FuturePathAPI.initApp import app
-from FuturePathAPI.libs import ReadWriteLock
-from FuturePathAPI.libs.jsonTools import jsonHook
-from FuturePathAPI.libs.FrozenDict import FrozenDict
+from FuturePathAPI.libs import jsonTools
+from FuturePathAPI.libs.Distribution import Distribution, keep_sum
+from FuturePathAPI.libs.LRUCache import LRUCache
+from FuturePathAPI.libs.DistributionTable import distributionTable
+from FuturePathAPI.libs.RandomGenerator import get_generator, seeded
+from FuturePathAPI.libs.Instrumentation import timed, cacheSync
+from FuturePathAPI.libs.Profiling import profiled
+from FuturePathAPI.libs.Admission import costBudget, CostError
+from FuturePathAPI.libs.RateLimit import rate_limited
+from FuturePathAPI import MAINDIR
+
+
+blueprint = Blueprint('rolling', __name__)
 
 
 confirmSyntax = re.compile(r'^(\d){0,3}d\d{1,2}(((\+|-)\d{1,2})*)$', re.IGNORECASE)
@@ -27,6 +37,24 @@ determineMultiplier = re.compile(r'^(\d){1,3}', re.IGNORECASE)
 determineModifier = re.compile(r'[\+|-]\d{1,2}', re.IGNORECASE)
 splitString = re.compile(r'([\+|-])')
 reverseSplitString = re.compile(r'(\d){0,3}d\d{1,2}')
+maxRepeatRoll = 10000
+maxBatchRolls = 500
+maxStreamRepeatRoll = 1000000
+streamChunkSize = 10000
+planCacheSize = 1024
+# Plans hold on to their distributions so the plan cache has a byte limit like ProbabilityMemorizer.
+planCacheBytes = 64 * 1024 * 1024
+_missing = object()
+dropOptions = ('dropLowest', 'dropHighest', 'keepHighest', 'keepLowest')
+rollKeys = ('dString', 'modifier', 'dieOptions', 'dice', 'diceOptions', 'rollID', 'seed')
+dieKeys = ('id', 'dString', 'modifier', 'connectorString', 'dieOptions')
+# Cost units are roughly 10ns of work. Each repeat of a roll builds its own result so it costs more than a die.
+rollRepeatCost = 250
+# One step of keep_sum (see RollTerm.estimate_cost).
+keepStepCost = 400
+rollDieCost = 5
+DISTRIBUTION_TABLE = "/libs/distributions"
+distributionTable.load(MAINDIR + DISTRIBUTION_TABLE)
 
 
 """
@@ -39,15 +67,17 @@ reverseSplitString = re.compile(r'(\d){0,3}d\d{1,2}')
 
 def randomPicker(choices, p):
     """
-        A wrapper for the numpy choice
+        A wrapper for the numpy choice using the thread's Generator. The rollers draw from a distribution's cached
+        alias table instead, this is kept for library users.
     :param choices: a list or iterable to choose from
     :param p: probabilities
     :return: (int)
     """
-    return int(choice(list(choices), p=p))
+    return int(get_generator().choice(list(choices), p=p))
 
 
-@app.route('/tasks/roll/character/<level>', methods=['GET'])
+@blueprint.route('/tasks/roll/character/<level>', methods=['GET'])
+@rate_limited
 def rollCharacter(level):
     """
         :OPTIONS: GET
@@ -87,20 +117,26 @@ def covertToDigit(tmpStr):
     return 0
 
 
+def covertToDropCount(tmpStr):
+    if tmpStr:
+        tmpStr = str(tmpStr)
+        if tmpStr.lower() == "false":
+            return 0
+        elif tmpStr.lower() == "true":
+            return 1
+        return int(tmpStr)
+    return tmpStr
+
+
 def parse_die_options(options):
     dieOptions = {}
 
-    if 'dropLowest' in options:
-        dropLowest = options.get('dropLowest', 0)
-        if dropLowest:
-            dropLowest = str(dropLowest)
-            if dropLowest.lower() == "false":
-                dropLowest = 0
-            elif dropLowest.lower() == "true":
-                dropLowest = 1
-            else:
-                dropLowest = int(dropLowest)
-        dieOptions['dropLowest'] = dropLowest
+    for dropOption in dropOptions:
+        if dropOption in options:
+            try:
+                dieOptions[dropOption] = covertToDropCount(options.get(dropOption, 0))
+            except ValueError:
+                raise Exception(f"'{dropOption}' has to be True, False or an integer")
 
     if 'rerollTotal' in options:
         dieOptions['rerollTotal'] = covertToDigit(options.get('rerollTotal', 0))
@@ -114,26 +150,102 @@ def parse_die_options(options):
     return dieOptions
 
 
+def parse_seed(seed):
+    """ The optional 'seed' of a roll request as a non-negative int or None. """
+    if seed is None or seed == '':
+        return None
+    if type(seed) is bool or not str(seed).isdigit():
+        raise Exception('The seed has to be a non-negative integer')
+    return int(seed)
+
+
+def _decode_options(options):
+    if not isinstance(options, dict):
+        raise Exception('dieOptions and diceOptions have to be JSON objects')
+    return dict(options)
+
+
+def decode_roll_request(dJSON):
+    """
+        Decode a JSON roll (a dict or the raw JSON text) into a new dict with only the keys a roll uses. The options
+        are copied on the way so the analyzer can change them without touching the caller's JSON. This is one pass
+        over the few keys in a roll rather than a copy of everything that was sent.
+    :return: dict
+    """
+    if isinstance(dJSON, (str, bytes, bytearray)):
+        dJSON = jsonTools.loads(dJSON)
+    if not isinstance(dJSON, dict):
+        raise Exception('A roll has to be a JSON object')
+    roll = {key: dJSON[key] for key in rollKeys if key in dJSON}
+    for key in ('dieOptions', 'diceOptions'):
+        if key in roll:
+            roll[key] = _decode_options(roll[key])
+    if 'dice' in roll:
+        if not isinstance(roll['dice'], list) or not all(isinstance(die, dict) for die in roll['dice']):
+            raise Exception("'dice' has to be a list of JSON objects")
+        roll['dice'] = [{key: _decode_options(die[key]) if key == 'dieOptions' else die[key]
+                         for key in dieKeys if key in die} for die in roll['dice']]
+    return roll
+
+
+def roll_key(value):
+    """
+        A hashable key for a roll decoded by decode_roll_request. Dicts become tuples of their sorted items and lists
+        become tuples so two rolls that would be the same JSON get the same key without encoding them again.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, roll_key(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(roll_key(item) for item in value)
+    return value
+
+
 def parse_dice_options(options):
 
     options.pop('rerollTotal', None)
     options.pop('rerollDie', None)
+    options.pop('dropHighest', None)
+    options.pop('keepHighest', None)
+    options.pop('keepLowest', None)
 
     diceOptions = parse_die_options(options)
 
     if 'repeatRoll' in options:
-        diceOptions['repeatRoll'] = covertToDigit(options.get('repeatRoll', 0))
+        repeatRoll = options.get('repeatRoll', 0)
+        if repeatRoll and type(repeatRoll) is not bool and not str(repeatRoll).isdigit():
+            raise Exception("'repeatRoll' has to be a non-negative integer")
+        diceOptions['repeatRoll'] = covertToDigit(repeatRoll)
 
     return diceOptions
 
 
-@app.route('/tasks/roll/<dString>', methods=['GET'])
+def compile_or_abort(compiler, *args):
+    """
+        compiler(*args) (DieAnalyzer.compile_str or compile_json) with a roll that can not be analyzed answered as a
+        400 instead of a 500. CostError is left to its own handler.
+    :return: RollPlan
+    """
+    try:
+        plan = compiler(*args)
+    except CostError:
+        raise
+    except Exception as e:
+        print(f"ERROR: {e}")
+        abort(400, description=f'{e}')
+    if plan is None:
+        abort(400, description='Unable to analyze the roll')
+    return plan
+
+
+@blueprint.route('/tasks/roll/<dString>', methods=['GET'])
+@rate_limited
+@profiled
 def roll_from_get(dString):
     """
         :OPTIONS: GET
         :PATH: /tasks/roll/<dString>
         :VARIABLES: dString (string) This stands for Die or Dice String.
-        :PARAM: dropLowest, rerollTotal, rerollDie, subAll, addAll
+        :PARAM: dropLowest, dropHighest, keepHighest, keepLowest, rerollTotal, rerollDie, subAll, addAll, seed
         :DESC: The Die or Dice described in dString is analyzed for rolling. HTTP Parameters are passed to adjust the
             rolling.
         Examples:
@@ -151,10 +263,16 @@ def roll_from_get(dString):
             This can be either False, True, or Int. True == 1. If True or 1 then this
             causes the roller to drop the lowest die before totalling the value. If the number is higher than 1 then
             it will drop the lowest die X number of times.
+        dropHighest: (default value: False)
+            The same as dropLowest except the highest die are dropped.
+        keepHighest: (default value: False)
+            This needs to be an integer. Only the highest X die are totalled. IE: 2d20?keepHighest=1 is advantage.
+        keepLowest: (default value: False)
+            This needs to be an integer. Only the lowest X die are totalled. IE: 2d20?keepLowest=1 is disadvantage.
         rerollTotal: (default value: False)
             This needs to be an integer. This will cause the roller to reroll the
-            dice if the die is below a certain value. This will attempt to reroll 101 times. Currently, there is no
-            logic to control the number of reroll attempts.
+            dice if the total is equal to or below a certain value. The total is picked directly from the totals above
+            that value so only one roll is ever needed.
         rerollDie: (default value: False)
             This has to be an Int or a list of Ints. This will actually remove that Int
             or list of Ints from the possible roll of the die. So that when the die is rolled it can never choose that
@@ -165,6 +283,12 @@ def roll_from_get(dString):
         addAll: (default value: 0)
             This has to be an Int. This acts like subAll. It  adjusts the probability range of
             ALL die to be rolled by adding the Int value off ALL possible numbers before rolling.
+        seed: (default value: None)
+            This has to be a non-negative Int. The same request with the same seed always rolls the same result.
+            Without a seed every roll is random.
+
+        Profiling: Send the header 'X-Profile: collapsed' (or 'cprofile') with a valid 'Token' to get the profile of
+            the request back with the roll. Add ',file' to the header value to write it on the server instead.
         :Content-Type: application/json
      """
 
@@ -176,14 +300,155 @@ def roll_from_get(dString):
         dieOptions = parse_die_options(request.args)
     except Exception as e:
         print(f"ERROR: {e}")
-        abort(501)
+        abort(400, description=f'{e}')
+
+    try:
+        seed = parse_seed(request.args.get('seed'))
+    except Exception as e:
+        print(f"ERROR: {e}")
+        abort(400, description=f'{e}')
+
+    plan = compile_or_abort(DieAnalyzer.compile_str, dString, dieOptions)
+    with costBudget.reserve(plan.rollCost), seeded(seed):
+        return jsonify(plan.roll())
+
+
+@blueprint.route('/tasks/probability/<dString>', methods=['GET'])
+@rate_limited
+def probability_from_get(dString):
+    """
+        :OPTIONS: GET
+        :PATH: /tasks/probability/<dString>
+        :VARIABLES: dString (string) This stands for Die or Dice String. The same as /tasks/roll/<dString>.
+        :PARAM: percentiles, dropLowest, dropHighest, keepHighest, keepLowest, rerollTotal, rerollDie, subAll, addAll
+        :DESC: Rather than rolling the dice this returns the exact odds of every total that rolling dString with the
+            same HTTP Parameters could produce. The answer is always the same for the same request.
+        Examples:
+            * /d20 (Every total has a 0.05 chance)
+            * /4d6?dropLowest=1&rerollTotal=8 (The odds of a character's ability score)
+            * /2d20?keepHighest=1&percentiles=10,50,90
+
+        percentiles: (default value: 5,25,50,75,95)
+            A comma separated list of numbers between 0 and 100. Each one is answered with the lowest total that is
+            equal to or higher than that percent of all rolls.
+
+        The returned JSON has these keys:
+            * Min/Max: The lowest and highest possible totals.
+            * Mean/Variance: The average total and its variance.
+            * PMF: The chance of rolling each total.
+            * CDF: The chance of rolling each total or lower.
+            * Percentiles: The total at each requested percentile.
+        :Content-Type: application/json
+     """
+
+    if len(dString) > 36:
+        abort(500)
+
+    try:
+        dieOptions = parse_die_options(request.args)
+        percentiles = [float(p) for p in request.args.get('percentiles', '5,25,50,75,95').split(',') if p.strip()]
+    except Exception as e:
+        print(f"ERROR: {e}")
+        abort(400, description=f'{e}')
+
+    for p in percentiles:
+        # Written this way round so NaN, which fails every comparison, is rejected too.
+        if not 0 <= p <= 100:
+            abort(400, description=f'Percentiles have to be between 0 and 100 not {p:g}')
+
+    plan = compile_or_abort(DieAnalyzer.compile_str, dString, dieOptions)
+    costBudget.check_build(plan.distributionCost)
+    dist = plan.distribution
+
+    values, probabilities, cdf = dist.values.tolist(), dist.probabilities.tolist(), dist.cdf.tolist()
+    return jsonify({'dString': dString,
+                    'Min': dist.minimum,
+                    'Max': dist.maximum,
+                    'Mean': dist.mean,
+                    'Variance': dist.variance,
+                    'PMF': {value: prob for value, prob in zip(values, probabilities) if prob},
+                    'CDF': {value: c for value, c, prob in zip(values, cdf, probabilities) if prob},
+                    'Percentiles': {f'{p:g}': dist.percentile(p) for p in percentiles}})
+
+
+def batch_size():
+    """ The number of rolls sent to '/tasks/roll/batch', which is what the batch costs against the rate limit. """
+    rolls = request.get_json(silent=True)
+    if isinstance(rolls, dict):
+        rolls = rolls.get('rolls')
+    return max(len(rolls), 1) if isinstance(rolls, list) else 1
+
+
+@blueprint.route('/tasks/roll/batch', methods=['POST'])
+@rate_limited(cost=batch_size)
+def roll_batch_from_json():
+    """
+    :OPTIONS: POST
+    :PATH: /tasks/roll/batch
+    :DESC: Roll many JSON rolls with a single request. Each roll uses the same JSON as the '/tasks/roll' end point and
+        should have its own 'rollID'. The results are returned keyed by 'rollID'. A roll that cannot be analyzed or
+        rolled returns an 'Error' for its 'rollID' instead of failing every other roll in the batch. Items that have
+        no usable 'rollID' (they are not a JSON object or reuse a 'rollID') are listed in 'Errors' by their 'index' in
+        'rolls' instead. Rolls that are exactly the same are only analyzed once and rolled together.
 
-    die = DieAnalyzer.die_str_analyzer(dString, dieOptions)
+        Example: (An attack roll and two damage rolls)
 
-    return jsonify(DieRoller.roll_dice(dice=die[0], connectors=die[1], diceOptions={}))
+        .. code-block:: json
+
+            {
+                "rolls": [
+                    {"rollID": "attack", "dString": "d20", "modifier": "+5"},
+                    {"rollID": "damage1", "dString": "2d6", "modifier": "+3"},
+                    {"rollID": "damage2", "dString": "2d6", "modifier": "+3"}
+                ]
+            }
 
+        Returns:
 
-@app.route('/tasks/roll', methods=['POST'])
+        .. code-block:: json
+
+            {
+                "Results": {
+                    "attack": {"Rolls": [{"Dice": [17], "Total": 17}]},
+                    "damage1": {"Rolls": [{"Dice": [9], "Total": 9}]},
+                    "damage2": {"Rolls": [{"Dice": [6], "Total": 6}]}
+                },
+                "Errors": []
+            }
+
+        JSON Requirements:
+            * The top key is 'rolls' which is a list. The list itself can also be sent in place of the top key.
+            * Each item in 'rolls' follows the JSON Requirements of '/tasks/roll'.
+            * If an item does not have a 'rollID' its position in the 'rolls' list is used.
+            * Max 500 rolls per request. Every roll counts as one request against the rate limit.
+            * An optional top level 'seed' (non-negative Int) makes the whole batch reproducible. A 'seed' on a single
+              item is ignored.
+    :Accept: application/json
+    :Content-Type: application/json
+    """
+    if not request.json:
+        abort(400)
+
+    rolls = request.json
+    seed = None
+    if isinstance(rolls, dict):
+        try:
+            seed = parse_seed(rolls.get('seed'))
+        except Exception as e:
+            print(f"ERROR: {e}")
+            abort(400)
+        rolls = rolls.get('rolls')
+    if not isinstance(rolls, list) or not rolls or len(rolls) > maxBatchRolls:
+        abort(400)
+
+    with seeded(seed):
+        results, errors = DieRoller.roll_batch(rolls)
+    return jsonify({'Results': results, 'Errors': errors})
+
+
+@blueprint.route('/tasks/roll', methods=['POST'])
+@rate_limited
+@profiled
 def roll_from_json():
     """
     :OPTIONS: POST
@@ -257,20 +522,28 @@ def roll_from_json():
             * 'connectorString' can only be a '+' or '-' and HAS to exist in order for the next die to be added.
             * dieOptions key is used to identify options to a specific dString and will be passed to only that roll.
             * diceOptions key is used outside the 'dice' list and will be applied globally.
-            * The top keys are 'dice', 'diceOptions' and 'modifier'.
+            * The top keys are 'dice', 'diceOptions', 'modifier' and optionally 'rollID' and 'seed'.
+            * 'seed' has to be a non-negative Int. The same JSON with the same seed always rolls the same result.
             * An item in the 'dice' list should have 'id, 'dString', and optionally 'modifier', 'connectorString',
               and 'dieOptions'.
-            * dieOptions are: 'dropLowest', 'rerollTotal', 'rerollDie'. 'subAll', 'addAll'.
+            * dieOptions are: 'dropLowest', 'dropHighest', 'keepHighest', 'keepLowest', 'rerollTotal', 'rerollDie'.
+              'subAll', 'addAll'.
             * diceOptions are: 'dropLowest', 'subAll', 'addAll', 'repeatRoll'
 
         dropLowest: (default value: False)
             This can be either False, True, or Int. True == 1. If True or 1 then this
             causes the roller to drop the lowest die before totalling the value. If the number is higher than 1 then
             it will drop the lowest die X number of times.
+        dropHighest: (default value: False)
+            Is for 'dieOptions' only. The same as dropLowest except the highest die are dropped.
+        keepHighest: (default value: False)
+            Is for 'dieOptions' only. This needs to be an integer. Only the highest X die are totalled.
+        keepLowest: (default value: False)
+            Is for 'dieOptions' only. This needs to be an integer. Only the lowest X die are totalled.
         rerollTotal: (default value: False)
             Is for 'dieOptions' only. This needs to be an integer. This will cause the roller to reroll the
-            dice if the die is below a certain value. This will attempt to reroll 101 times. Currently, there is no
-            logic to control the number of reroll attempts.
+            dice if the total is equal to or below a certain value. The total is picked directly from the totals above
+            that value so only one roll is ever needed.
         rerollDie: (default value: False)
             Is for 'dieOptions' only. This has to be an Int or a list of Ints. This will actually remove that Int
             or list of Ints from the possible roll of the die. So that when the die is rolled it can never choose that
@@ -283,27 +556,60 @@ def roll_from_json():
             ALL die to be rolled by adding the Int value off ALL possible numbers before rolling.
         repeatRoll: (default value: False)
             Is for 'diceOptions' only. This has to be an Int. This will take each die give in the 'dices' list
-            and preform the same action Int number of times. Max 10. The return json will look as if the request was
+            and preform the same action Int number of times. Max 10000. The return json will look as if the request was
             originally submitted asking for each roll. (Helpful for when testing)
+
+        Streaming: Send the header 'Accept: application/x-ndjson' to have the rolls streamed back as they are rolled
+            with one JSON roll per line. This raises the max repeatRoll to 1000000. The dice option 'dropLowest' can
+            not be streamed since every roll has to be known before the lowest can be dropped.
+
+        Profiling: The same 'X-Profile' header as '/tasks/roll/<dString>'.
+
+        Cost: Every roll is given an estimated cost from its dice, options and repeatRoll before any of it is run. A
+            roll that would take too long to set up gets a 422, one that would take too long to roll gets a 413 and
+            when the server is busy with other expensive rolls a 503 with a 'Retry-After' header.
     :Accept: application/json
-    :Content-Type: application/json
+    :Content-Type: application/json or application/x-ndjson
     """
     if not request.json:
-        abort(400)
+        abort(400, description='A JSON roll is required')
 
-    dJSON = jsonHook(request.json)
+    dJSON = request.json
 
-    dice = DieAnalyzer.die_json_analyzer(dJSON)
+    plan = compile_or_abort(DieAnalyzer.compile_json, dJSON)
 
-    if dice is None:
-        abort(400)
+    try:
+        seed = parse_seed(dJSON.get('seed'))
+    except Exception as e:
+        print(f"ERROR: {e}")
+        abort(400, description=f'{e}')
 
-    if 'rollID' in dJSON:
-        return jsonify({'rollID': dJSON.get('rollID'), **DieRoller.roll_dice(dice=dice[0],
-                                                                             connectors=dice[1],
-                                                                             diceOptions=dice[2])})
+    if 'application/x-ndjson' in request.headers.get('Accept', '').lower():
+        try:
+            rolls = plan.stream(rollID=dJSON.get('rollID'))
+        except Exception as e:
+            print(f"ERROR: {e}")
+            abort(400, description=f'{e}')
+
+        # The cost is held until the stream ends or is closed, even if the client goes away before it is read.
+        reservation = costBudget.reserve(plan.rollCost)
+
+        def _seeded_stream():
+            # The generator runs after this function returns so the seed has to be applied inside it.
+            try:
+                with seeded(seed):
+                    yield from rolls
+            finally:
+                reservation.release()
+
+        response = Response(stream_with_context(_seeded_stream()), mimetype='application/x-ndjson')
+        response.call_on_close(reservation.release)
+        return response
 
-    return jsonify(DieRoller.roll_dice(dice=dice[0], connectors=dice[1], diceOptions=dice[2]))
+    with costBudget.reserve(plan.rollCost), seeded(seed):
+        if 'rollID' in dJSON:
+            return jsonify({'rollID': dJSON.get('rollID'), **plan.roll()})
+        return jsonify(plan.roll())
 
 
 class Memorizer(object):
@@ -311,18 +617,81 @@ class Memorizer(object):
         Decorator. Caches a function's return value each time it is called.
         If called later with the same arguments, the cached value is returned
         (not reevaluated).
+
+        The cache is an LRUCache limited by 'maxSize' items and optionally 'maxBytes' and a 'ttl' in seconds. These
+        default to the class attributes so subclasses set the limits for everything they decorate. Arguments are
+        compared by equality (not just their hash) so two different calls can never share a value. Calls with
+        arguments that can not be hashed are simply not cached. Every Memorizer is listed in 'Memorizer.instances' by
+        the name of the function it decorates so its counters can be read with stats() or Memorizer.all_stats().
+
+        A hit is a single lookup in the cache. On a miss only the first caller computes the value. Any other caller
+        that misses the same key while it is being computed waits for that result instead of computing it again (and
+        is counted in 'waits' and 'waitSeconds').
     """
-    def __init__(self, func):
+
+    maxSize = 1024
+    maxBytes = None
+    ttl = None
+    phase = None
+    instances = {}
+
+    def __init__(self, func, maxSize=None, maxBytes=None, ttl=None):
         self._func = func
-        self._cache = {}
-        self._ReadL, self._WriteL = ReadWriteLock.generateLockPair()
+        self.name = func.__name__
+        self._cache = LRUCache(maxSize=maxSize or self.maxSize, maxBytes=maxBytes or self.maxBytes,
+                               ttl=ttl or self.ttl)
+        self._inFlight = {}
+        self._inFlightLock = threading.Lock()
+        self.waits = 0
+        self.waitSeconds = 0.0
+        Memorizer.instances[self.name] = self
+        cacheSync.register(self.name, self)
 
     def __call__(self, *args, **kwargs):
-        hashKey = hash((args, FrozenDict(**kwargs)))
-        if self.__isHashInCache(hashKey):
-            return self.__getHashValue(hashKey)
-        self.__setHashValue(hashKey, self._func(*args, **kwargs))
-        return self.__getHashValue(hashKey)
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            value = self._cache.get(key, _missing)
+        except TypeError:
+            return self._func(*args, **kwargs)
+        if value is _missing:
+            return self._compute(key, args, kwargs)
+        return value
+
+    def _compute(self, key, args, kwargs):
+        with self._inFlightLock:
+            flight = self._inFlight.get(key)
+            if flight is None:
+                # The value may have been stored between the miss and taking the lock.
+                value = self._cache.peek(key, _missing)
+                if value is not _missing:
+                    return value
+                flight = self._inFlight[key] = _Flight()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            start = time.perf_counter()
+            flight.event.wait()
+            with self._inFlightLock:
+                self.waits += 1
+                self.waitSeconds += time.perf_counter() - start
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            with timed(self.phase):
+                value = self._func(*args, **kwargs)
+            flight.value = self._cache.set(key, value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._inFlightLock:
+                self._inFlight.pop(key, None)
+            flight.event.set()
+        return flight.value
 
     def __repr__(self):
         """Return the function's docstring."""
@@ -332,60 +701,103 @@ class Memorizer(object):
         """Support instance methods."""
         return functools.partial(self.__call__, obj)
 
-    def __isHashInCache(self, hashKey):
-        with self._ReadL:
-            return hashKey in self._cache
+    def stats(self):
+        stats = self._cache.stats()
+        with self._inFlightLock:
+            stats.update({'inFlight': len(self._inFlight), 'waits': self.waits, 'waitSeconds': self.waitSeconds})
+        return stats
+
+    def resize(self, maxSize=None, maxBytes=None, ttl=None):
+        return self._cache.resize(maxSize=maxSize, maxBytes=maxBytes, ttl=ttl)
+
+    def reset_stats(self):
+        self._cache.reset_stats()
+        with self._inFlightLock:
+            self.waits = 0
+            self.waitSeconds = 0.0
 
-    def __getHashValue(self, hashKey):
-        with self._ReadL:
-            return self._cache[hashKey]
+    def clear(self):
+        return self._cache.clear()
+
+    @staticmethod
+    def all_stats():
+        return {name: memorizer.stats() for name, memorizer in Memorizer.instances.items()}
 
-    def __setHashValue(self, hashKey, hashValue):
-        self._cache[hashKey] = hashValue
+
+class _Flight(object):
+    """ A value being computed by Memorizer that other callers can wait on. """
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
 
 
 class ProbabilityMemorizer(Memorizer):
-    pass
+    maxSize = 4096
+    maxBytes = 64 * 1024 * 1024
+    phase = 'distribution'
 
 
 class DieAnylizerMemorizer(Memorizer):
-    pass
+    maxSize = 4096
 
 
-class RollProbabilityGenerator(object):
+class RollProbabilityGenerator(Distribution):
+    """
+        The distribution of rolling a die 'repeat' times and totalling the result. The single die distribution is
+        convolved with itself using repeated squaring so large rolls like 100d6 or 50d20 are cheap to build.
+    """
 
     def __init__(self, *args, **kwargs):
-        self.numberDict = dict()
-        self.productCount = 0.0
-        self.probabilityMap = []
+        super(RollProbabilityGenerator, self).__init__()
+        self.probabilities = numpy.empty(0)
         if args:
             self(*args, **kwargs)
 
-    def _saveNumbers(self, number):
-        self.productCount += 1
-        number = sum(number)
-        if number in self.numberDict:
-            self.numberDict[number] = (self.numberDict[number] + 1)
-        else:
-            self.numberDict[number] = 1.0
-
-    def _generateProbabilityMap(self):
-        def caculateProbability(item):
-            return item[1] / self.productCount
-        self.probabilityMap = list(map(caculateProbability, sorted(self.numberDict.items())))
+    def __call__(self, die, repeat=1):
+        if not self.probabilities.size:
+            dist = Distribution.from_faces(die).power(repeat)
+            self.offset, self.probabilities = dist.offset, dist.probabilities
         return self.probabilityMap
 
-    def __call__(self, *args, **kwargs):
-        if self.probabilityMap:
-            return self.probabilityMap
-        list(filter(self._saveNumbers, product(*args, **kwargs)))
-        self.numberDict = dict(sorted(self.numberDict.items()))
-        return self._generateProbabilityMap()
+    @property
+    def numberDict(self):
+        """ Mapping of each possible total to its probability. Kept for backwards compatibility. """
+        return {int(value): float(prob) for value, prob in zip(self.values, self.probabilities) if prob}
+
+    @property
+    def probabilityMap(self):
+        """ The probabilities of each key in 'numberDict' in the same order. Kept for backwards compatibility. """
+        return [float(prob) for prob in self.probabilities if prob]
 
 
 @ProbabilityMemorizer
 def _getProbability(die, repeat=1):
-    return RollProbabilityGenerator(die, repeat=repeat)
+    # Distributions built by 'python -m FuturePathAPI.warmup' are memory-mapped and shared with the other workers.
+    rpg = RollProbabilityGenerator()
+    if not distributionTable.fill(rpg, die, repeat):
+        rpg(die, repeat=repeat)
+    return rpg
+
+
+@ProbabilityMemorizer
+def _getKeepProbability(die, repeat, low=0, high=0):
+    return keep_sum(_getProbability(die, repeat=1), repeat, low=low, high=high)
+
+
+@ProbabilityMemorizer
+def _getRerollProbability(die, repeat, rerollTotal, low=0, high=0):
+    if low or high:
+        return _getKeepProbability(die, repeat, low=low, high=high).condition_above(rerollTotal)
+    return _getProbability(die, repeat=repeat).condition_above(rerollTotal)
+
+
+@ProbabilityMemorizer
+def _getDiceProbability(dice, connectors):
+    return DieRoller.get_dice_distribution(dice, list(connectors))
 
 
 @DieAnylizerMemorizer
@@ -511,74 +923,92 @@ class Roller(object):
     @staticmethod
     def _roller(die, multipler):
         # print(f'_roller:\n\tdie: {die}\n\tmultipler: {multipler}')
-        if type(multipler) is list:
-            return sum([randomPicker(rpg.numberDict.keys(), p=rpg.probabilityMap)
-                        for rpg in [_getProbability(die, repeat=m) for m in multipler]])
-        rpg = _getProbability(die, repeat=multipler)
-        return randomPicker(rpg.numberDict.keys(), p=rpg.probabilityMap)
-
-    @staticmethod
-    def _drop_lowest(die, multipler, dropLowest):
         if isinstance(multipler, Iterable):
             multipler = sum(multipler)
+        return _getProbability(die, repeat=multipler).draw()
 
-        if multipler <= dropLowest:
+    @staticmethod
+    def _get_drop_counts(multipler, dropLowest=0, dropHighest=0, keepHighest=0, keepLowest=0, **kwargs):
+        """
+            Turn the drop/keep options into the number of low and high die to remove from a roll of 'multipler' dice.
+        :return: tuple (low, high)
+        """
+        def _count(option):
+            if type(option) is bool:
+                return int(option)
+            return int(option or 0)
+
+        low, high = _count(dropLowest), _count(dropHighest)
+        if keepHighest:
+            low += multipler - _count(keepHighest)
+        if keepLowest:
+            high += multipler - _count(keepLowest)
+        if low < 0 or high < 0:
+            raise Exception('The number of dice to keep is greater then the number of requested dice to roll')
+        if multipler <= low + high:
             raise Exception('The number of dice to drop is greater then or equal to the number of requested '
                             'dice to roll')
+        return low, high
 
-        multipler = [1] * multipler
-        choices = [randomPicker(rpg.numberDict.keys(), p=rpg.probabilityMap)
-                   for rpg in [_getProbability(die, repeat=m) for m in multipler]]
-        if type(dropLowest) is not int:
-            choices.pop(choices.index(min(choices)))
-            return sum(choices)
-        for x in range(int(dropLowest)):
-            choices.pop(choices.index(min(choices)))
-        return sum(choices)
+    @staticmethod
+    def _drop_dice(die, multipler, count=1, **kwargs):
+        """
+            Roll 'multipler' dice 'count' times as one (count x multipler) matrix and total each row after removing the
+            low/high die described by the drop/keep options. np.partition places the removed die at the edges of each
+            row without sorting it.
+        :return: numpy array of 'count' totals
+        """
+        if isinstance(multipler, Iterable):
+            multipler = sum(multipler)
+        low, high = Roller._get_drop_counts(multipler, **kwargs)
+        return Roller._drop_from_matrix(_getProbability(die, repeat=1), multipler, count, low, high)
 
     @staticmethod
-    def _reroll_total(die, multipler, rerollTotal, dropLowest=False, **kwargs):
-        if rerollTotal >= DieRoller._get_max_roll(die, multipler):
-            raise Exception('Total is equal to or exceeds dice\'s max possible roll')
+    def _drop_from_matrix(single, multipler, count, low, high):
+        rolls = single.sample(count * multipler).reshape(count, multipler)
+        kth = sorted({low, multipler - high - 1})
+        return numpy.partition(rolls, kth, axis=1)[:, low:multipler - high].sum(axis=1)
 
-        if dropLowest:
-            rollFunc = functools.partial(DieRoller._drop_lowest, dropLowest=dropLowest)
-        else:
-            rollFunc = DieRoller._roller
+    @staticmethod
+    def _drop_lowest(die, multipler, dropLowest):
+        return int(Roller._drop_dice(die, multipler, dropLowest=dropLowest)[0])
 
-        count = 0
-        while count < 11:
-            total = rollFunc(die, multipler)
-            if total > rerollTotal:
-                return total
-            count += 1
-            if count == 11:
-                raise Exception('Total Reroll attempts exceeded!')
+    @staticmethod
+    def _reroll_total(die, multipler, rerollTotal, count=None, **kwargs):
+        """
+            Roll a total that is above 'rerollTotal'. Instead of rerolling until it succeeds the roll is drawn from the
+            exact distribution of the dice with every total equal to or below 'rerollTotal' removed. When drop/keep
+            options are used the distribution is built from the order statistics of the dice.
+        :return: int or a numpy array of 'count' totals
+        """
+        rpg = Roller.get_distribution(die, multipler, rerollTotal=rerollTotal, **kwargs)
+        if count is None:
+            return rpg.draw()
+        return rpg.sample(count)
 
     @staticmethod
     def get_probabilities(die, repeat=0):
         return _getProbability(die, repeat=repeat)
 
     @staticmethod
-    def reducer(multipler):
-
-        def _subtractor(val):
-            return abs(val - 5)
-
-        if multipler is None:
-            return 1
-        elif multipler <= 5:
-            return multipler
-
-        multiplerList = []
-        while True:
-            multiplerList.append(5)
-            multipler = _subtractor(multipler)
-            if multipler < 5:
-                if multipler != 0:
-                    multiplerList.append(multipler)
-                break
-        return multiplerList
+    def get_distribution(die, multipler, rerollTotal=None, **kwargs):
+        """
+            The exact distribution of a single die roll with the drop/keep and rerollTotal options applied.
+        :return: Distribution
+        """
+        if isinstance(multipler, Iterable):
+            multipler = sum(multipler)
+        low, high = 0, 0
+        if any(kwargs.get(dropOption) for dropOption in dropOptions):
+            low, high = Roller._get_drop_counts(multipler, **kwargs)
+        if rerollTotal is not None:
+            try:
+                return _getRerollProbability(die, multipler, rerollTotal, low=low, high=high)
+            except ValueError:
+                raise Exception('Total is equal to or exceeds dice\'s max possible roll')
+        if low or high:
+            return _getKeepProbability(die, multipler, low=low, high=high)
+        return _getProbability(die, repeat=multipler)
 
 
 class DieRoller(Roller):
@@ -599,19 +1029,46 @@ class DieRoller(Roller):
             die, multipler = _determine_numbers(args[0], **kwargs)
         elif isinstance(args[0], tuple):
             die, multipler = args[0], args[1]
-        multipler = DieRoller.reducer(multipler)
+        if multipler is None:
+            multipler = 1
         if kwargs.get('rerollTotal') is not None:
             return DieRoller._reroll_total(die, multipler, **kwargs)
-        if kwargs.get('dropLowest', False):
-            return DieRoller._drop_lowest(die, multipler, kwargs.get('dropLowest'))
+        if any(kwargs.get(dropOption) for dropOption in dropOptions):
+            return int(DieRoller._drop_dice(die, multipler, **kwargs)[0])
         return DieRoller._roller(die, multipler)
 
+    @staticmethod
+    def roll_die_many(count, *args, **kwargs):
+        """
+            The same as roll_die but rolls 'count' times and returns the results as a numpy array.
+        """
+        die, multipler = None, None
+        if not args:
+            return None
+        elif isinstance(args[0], str):
+            die, multipler = _determine_numbers(args[0], **kwargs)
+        elif isinstance(args[0], tuple):
+            die, multipler = args[0], args[1]
+        if multipler is None:
+            multipler = 1
+        if kwargs.get('rerollTotal') is not None:
+            return DieRoller._reroll_total(die, multipler, count=count, **kwargs)
+        if any(kwargs.get(dropOption) for dropOption in dropOptions):
+            return DieRoller._drop_dice(die, multipler, count=count, **kwargs)
+        if isinstance(multipler, Iterable):
+            multipler = sum(multipler)
+        return _getProbability(die, repeat=multipler).sample(count)
+
     @staticmethod
     def roll_total(die, modifier, dieOptions):
         # print("rollTotal:\n\tdie; %s\n\tmodifier: %s\n\tdieOptions: %s" % (die, modifier, dieOptions))
         roll = DieRoller.roll_die(*die, **dict(dieOptions))
         return _add_modifier(modifier, roll)
 
+    @staticmethod
+    def roll_total_many(die, modifier, dieOptions, count):
+        return _add_modifier(modifier, DieRoller.roll_die_many(count, *die, **dict(dieOptions)))
+
     @staticmethod
     def get_total_from_roll(diceRolls, connectors):
         total = diceRolls[0]
@@ -627,9 +1084,48 @@ class DieRoller(Roller):
         return {"Total": total, "Dice": diceRolls}
 
     @staticmethod
-    def roll_dice(dice, connectors, diceOptions):
-        # print "rollDice:\n\tdice; %s\n\tconnectors: %s\n\tdiceOptions: %s" % (dice, connectors, diceOptions)
+    def get_connector_signs(connectors, diceCount):
+        """
+            Turn the connectors into a vector of 1/-1 so the totals of a matrix of rolls is a single dot product. As
+            with get_total_from_roll a die without a connector in front of it is not counted towards the total.
+        """
+        if len(connectors) >= diceCount:
+            raise Exception('There are more connectors then there are dice to connect')
+        signs = numpy.zeros(diceCount, dtype=numpy.int64)
+        signs[0] = 1
+        for i, connector in enumerate(connectors, start=1):
+            signs[i] = 1 if connector.strip() == '+' else -1
+        return signs
+
+    @staticmethod
+    def get_dice_distribution(dice, connectors):
+        """
+            The exact distribution of the total of 'dice' joined by 'connectors'. This is the same total roll_dice
+            reports. Each die's distribution is shifted by its modifier and then added or subtracted from the total.
+        :return: Distribution
+        """
         connectors = DieRoller._checkConnectors(connectors)
+        total = Distribution()
+        for die, sign in zip(dice, DieRoller.get_connector_signs(connectors, len(dice))):
+            if not sign:
+                continue
+            dist = DieRoller.get_distribution(*die[0], **dict(die[2])).shift(_add_modifier(die[1], 0))
+            total = total.add(dist) if sign > 0 else total.subtract(dist)
+        return total
+
+    @staticmethod
+    def roll_matrix(dice, repeatRoll):
+        """
+            Roll every die in 'dice' 'repeatRoll' times. Each column is filled with one vectorized call.
+        :return: numpy array with the shape (repeatRoll, len(dice))
+        """
+        diceRolls = numpy.empty((repeatRoll, len(dice)), dtype=numpy.int64)
+        for column, die in enumerate(dice):
+            diceRolls[:, column] = DieRoller.roll_total_many(die[0], die[1], die[2], repeatRoll)
+        return diceRolls
+
+    @staticmethod
+    def _parse_dice_options(diceOptions, maxRepeat=maxRepeatRoll):
         diceOptions = dict(diceOptions)
         try:
             repeatRoll = int(diceOptions.get('repeatRoll', 0))
@@ -642,29 +1138,97 @@ class DieRoller(Roller):
         if 0 < repeatRoll <= dropLowest:
             raise Exception('The number of dice to drop is greater then or equal to the number of requested '
                             'dice to roll')
+        if repeatRoll > maxRepeat:
+            raise CostError(f'The repeatRoll option can not be higher then {maxRepeat}', 413, repeatRoll, maxRepeat)
+        return repeatRoll, dropLowest, subAll, addAll
+
+    @staticmethod
+    def _finish_rolls(diceRolls, signs, dropLowest=0, subAll=0, addAll=0):
+        """
+            Apply the dice options to a matrix of rolls and format it the way roll_dice returns it.
+        """
+        if dropLowest > 0:
+            lowest = numpy.argsort(diceRolls.sum(axis=1), kind='stable')[:dropLowest]
+            diceRolls = numpy.delete(diceRolls, lowest, axis=0)
 
-        diceRolls = [[DieRoller.roll_total(die[0], die[1], die[2]) for die in dice]]
-        for _ in range(repeatRoll-1):
-            diceRolls.append([DieRoller.roll_total(die[0], die[1], die[2]) for die in dice])
+        if subAll > 0:
+            diceRolls -= subAll
 
-        diceTotals = [sum(roll) for roll in diceRolls]
+        if addAll > 0:
+            diceRolls += addAll
 
-        for _ in range(int(dropLowest)):
-            diceRolls.pop(diceTotals.index(min(diceTotals)))
-            diceTotals.pop(diceTotals.index(min(diceTotals)))
+        totals = diceRolls @ signs
+        return {"Rolls": [{"Total": total, "Dice": rolls} for total, rolls in zip(totals.tolist(), diceRolls.tolist())]}
 
-        if type(subAll) is int and subAll > 0:
-            for roll in diceRolls:
-                for i, die in enumerate(roll):
-                    roll[i] = die - subAll
+    @staticmethod
+    def roll_dice(dice, connectors, diceOptions):
+        # print "rollDice:\n\tdice; %s\n\tconnectors: %s\n\tdiceOptions: %s" % (dice, connectors, diceOptions)
+        return RollPlan(dice, connectors, diceOptions).roll()
 
-        if type(addAll) is int and addAll > 0:
-            for roll in diceRolls:
-                for i, die in enumerate(roll):
-                    roll[i] = die + addAll
+    @staticmethod
+    def roll_dice_many(dice, connectors, diceOptions, count):
+        """
+            The same as calling roll_dice 'count' times except every die is rolled for all of them at once.
+        :return: list of 'count' results from roll_dice
+        """
+        return RollPlan(dice, connectors, diceOptions).roll_many(count)
 
-        rollsAndTotals = [DieRoller.get_total_from_roll(rolls, connectors) for rolls in diceRolls]
-        return {"Rolls": rollsAndTotals}
+    @staticmethod
+    def stream_dice(dice, connectors, diceOptions, rollID=None, chunkSize=streamChunkSize):
+        """
+            Roll the dice the same as roll_dice but return a generator of newline delimited JSON. See RollPlan.stream.
+        :return: generator of str
+        """
+        return RollPlan(dice, connectors, diceOptions).stream(rollID=rollID, chunkSize=chunkSize)
+
+    @staticmethod
+    def roll_batch(rolls):
+        """
+            Roll a list of JSON rolls. Rolls with the same JSON (other than 'rollID') share one RollPlan and are rolled
+            together with RollPlan.roll_many. An error only effects the roll(s) it happened in.
+        :param rolls: list of dicts in the format used by DieAnalyzer.die_json_analyzer
+        :return: tuple (dict of rollID (as a string) to the roll_dice result or {'Error': message}, list of
+            {'index': position in 'rolls', 'Error': message} for items that could not be given a rollID)
+        """
+        results = {}
+        errors = []
+        groups = {}
+        for index, roll in enumerate(rolls):
+            if not isinstance(roll, dict):
+                errors.append({'index': index, 'Error': 'Each roll has to be a JSON object'})
+                continue
+            rollID = f"{roll.get('rollID', index)}"
+            if rollID in results:
+                errors.append({'index': index, 'rollID': rollID,
+                               'Error': f'The rollID {rollID} is used more then once'})
+                continue
+            results[rollID] = None
+            try:
+                roll = decode_roll_request(roll)
+            except Exception as e:
+                results[rollID] = {'Error': f'{e}'}
+                continue
+            roll.pop('rollID', None)
+            roll.pop('seed', None)
+            key = roll_key(roll)
+            groups.setdefault(key, (roll, key, []))[2].append(rollID)
+
+        spent = 0
+        for roll, key, rollIDs in groups.values():
+            try:
+                plan = DieAnalyzer.compile_decoded(roll, key)
+                # The whole batch shares one request budget. Rolls after it runs out get an error instead.
+                cost = plan.rollCost * len(rollIDs)
+                costBudget.check_request(spent + cost)
+                with costBudget.reserve(cost):
+                    rolled = plan.roll_many(len(rollIDs))
+                spent += cost
+            except Exception as e:
+                results.update({rollID: {'Error': f'{e}'} for rollID in rollIDs})
+                continue
+            results.update(zip(rollIDs, rolled))
+
+        return results, errors
 
     @staticmethod
     def _checkConnectors(connectors):
@@ -678,6 +1242,189 @@ class DieRoller(Roller):
         return connectors
 
 
+class RollTerm(object):
+    """
+        One die of a RollPlan with its modifier folded into an int and the distribution it rolls from looked up ahead of
+        time. Dice with drop/keep options (and no rerollTotal) keep the single die distribution and roll a matrix.
+    """
+
+    __slots__ = ('die', 'multipler', 'modifier', 'options', 'low', 'high', 'distribution')
+
+    def __init__(self, die, modifier, options):
+        faces, multipler = die
+        if multipler is None:
+            multipler = 1
+        if isinstance(multipler, Iterable):
+            multipler = sum(multipler)
+        dieOptions = dict(options)
+        low, high = 0, 0
+        if dieOptions.get('rerollTotal') is None and any(dieOptions.get(option) for option in dropOptions):
+            low, high = Roller._get_drop_counts(multipler, **dieOptions)
+            distribution = _getProbability(faces, repeat=1)
+        else:
+            distribution = Roller.get_distribution(faces, multipler, **dieOptions)
+        for key, value in (('die', faces), ('multipler', multipler), ('modifier', _add_modifier(modifier, 0)),
+                           ('options', tuple(options)), ('low', low), ('high', high), ('distribution', distribution)):
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise TypeError("Cannot modify Immutable Instance")
+
+    @staticmethod
+    def estimate_cost(die, modifier, options):
+        """
+            Estimate the work of a die without building anything. Summing 'n' dice is a convolution over every possible
+            total. Drop/keep options run keep_sum which takes one step per face for each of the (n+1)(n+2)/2 ways dice
+            can already be placed. Each step is a few microseconds of Python plus numpy work over the totals of the kept
+            dice only. A die rolled as a matrix costs 'n' samples per roll instead of one.
+        :return: tuple (buildCost, dice sampled per roll, distributionCost)
+        """
+        faces, multipler = die
+        if multipler is None:
+            multipler = 1
+        if isinstance(multipler, Iterable):
+            multipler = sum(multipler)
+        size = len(faces)
+        dieOptions = dict(options)
+        span = multipler * (size - 1) + 1
+        sumCost = span * span.bit_length()
+        if not any(dieOptions.get(option) for option in dropOptions):
+            return sumCost, 1, sumCost
+        low, high = Roller._get_drop_counts(multipler, **dieOptions)
+        keptSpan = max(multipler - low - high, 1) * (size - 1) + 1
+        keepCost = size * (multipler + 1) * (multipler + 2) // 2 * (keepStepCost + keptSpan // 20)
+        if dieOptions.get('rerollTotal') is None:
+            return size, multipler, keepCost
+        return keepCost, 1, keepCost
+
+    def sample(self, count):
+        """ Roll this die 'count' times including its modifier. """
+        if self.low or self.high:
+            rolls = Roller._drop_from_matrix(self.distribution, self.multipler, count, self.low, self.high)
+        else:
+            rolls = self.distribution.sample(count)
+        if self.modifier:
+            rolls += self.modifier
+        return rolls
+
+
+class RollPlan(object):
+    """
+        A dice roll that has been analyzed and checked once so that it can be rolled over and over without parsing it
+        again. DieAnalyzer.compile_str and DieAnalyzer.compile_json cache these. A plan can not be changed once it is
+        created.
+
+        dice: The dice in the format returned by DieAnalyzer.die_str_analyzer / die_json_analyzer.
+        connectors: tuple of '+' or '-' between each die.
+        diceOptions: tuple of the dice option items.
+        terms: tuple of RollTerm, one per die.
+        signs: numpy array of 1, -1 or 0 for how each die counts towards the total.
+        modifier: The total of every die's modifier as it counts towards the total.
+        buildCost/rollCost/distributionCost: Estimated work to build the plan, to roll it once (with repeatRoll) and
+            to build its exact distribution. See RollTerm.estimate_cost and Admission.CostBudget.
+    """
+
+    __slots__ = ('dice', 'connectors', 'diceOptions', 'terms', 'signs', 'modifier', 'repeatRoll', 'dropLowest',
+                 'subAll', 'addAll', 'buildCost', 'rollCost', 'distributionCost')
+
+    def __init__(self, dice, connectors, diceOptions=()):
+        dice = tuple(dice)
+        connectors = DieRoller._checkConnectors(list(connectors))
+        repeatRoll, dropLowest, subAll, addAll = DieRoller._parse_dice_options(diceOptions,
+                                                                               maxRepeat=maxStreamRepeatRoll)
+        # The estimate only needs the parsed dice so an expensive plan is turned away before anything is built.
+        costs = [RollTerm.estimate_cost(*die) for die in dice]
+        buildCost = sum(cost[0] for cost in costs)
+        rollCost = (sum(cost[1] for cost in costs) * rollDieCost + rollRepeatCost) * max(repeatRoll, 1)
+        distributionCost = sum(cost[2] for cost in costs)
+        costBudget.check_build(buildCost)
+        terms = tuple(RollTerm(*die) for die in dice)
+        signs = DieRoller.get_connector_signs(connectors, len(dice))
+        signs.flags.writeable = False
+        modifier = sum(int(sign) * term.modifier for sign, term in zip(signs, terms))
+        for key, value in (('dice', dice), ('connectors', tuple(connectors)), ('diceOptions', tuple(diceOptions)),
+                           ('terms', terms), ('signs', signs), ('modifier', modifier), ('repeatRoll', repeatRoll),
+                           ('dropLowest', dropLowest), ('subAll', subAll), ('addAll', addAll), ('buildCost', buildCost),
+                           ('rollCost', rollCost), ('distributionCost', distributionCost)):
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise TypeError("Cannot modify Immutable Instance")
+
+    def __repr__(self):
+        return f'<RollPlan dice={len(self.dice)} repeatRoll={self.repeatRoll}>'
+
+    @property
+    def cachedBytes(self):
+        """
+            An estimate of the memory this plan keeps alive, mostly its terms' distributions. A distribution is
+            counted even when ProbabilityMemorizer also holds it since the plan keeps it after the memorizer drops it.
+        """
+        distributions = {id(term.distribution): term.distribution for term in self.terms}
+        return 1024 + sum(distribution.cachedBytes for distribution in distributions.values())
+
+    @property
+    def distribution(self):
+        """ The exact distribution of the total. See DieRoller.get_dice_distribution. """
+        return _getDiceProbability(self.dice, self.connectors)
+
+    @timed('sample')
+    def roll_matrix(self, count):
+        """
+            Roll every die 'count' times.
+        :return: numpy array with the shape (count, number of dice)
+        """
+        diceRolls = numpy.empty((count, len(self.terms)), dtype=numpy.int64)
+        for column, term in enumerate(self.terms):
+            diceRolls[:, column] = term.sample(count)
+        return diceRolls
+
+    def roll(self):
+        """ Roll the plan once. This returns the same result as DieRoller.roll_dice. """
+        if self.repeatRoll > maxRepeatRoll:
+            raise CostError(f'The repeatRoll option can not be higher then {maxRepeatRoll} unless the rolls are '
+                            f'streamed', 413, self.repeatRoll, maxRepeatRoll)
+        return DieRoller._finish_rolls(self.roll_matrix(max(self.repeatRoll, 1)), self.signs,
+                                       dropLowest=self.dropLowest, subAll=self.subAll, addAll=self.addAll)
+
+    def roll_many(self, count):
+        """
+            The same as calling roll 'count' times except every die is rolled for all of them at once.
+        :return: list of 'count' results from roll
+        """
+        if self.repeatRoll > maxRepeatRoll:
+            raise CostError(f'The repeatRoll option can not be higher then {maxRepeatRoll} unless the rolls are '
+                            f'streamed', 413, self.repeatRoll, maxRepeatRoll)
+        repeatRoll = max(self.repeatRoll, 1)
+        diceRolls = self.roll_matrix(repeatRoll * count).reshape(count, repeatRoll, len(self.terms))
+        return [DieRoller._finish_rolls(rolls, self.signs, dropLowest=self.dropLowest, subAll=self.subAll,
+                                        addAll=self.addAll) for rolls in diceRolls]
+
+    def stream(self, rollID=None, chunkSize=streamChunkSize):
+        """
+            Roll the plan but return a generator that rolls 'chunkSize' repeats at a time and yields them as newline
+            delimited JSON. Memory use depends on 'chunkSize' rather than repeatRoll. The options are checked before the
+            generator is returned so a bad request fails before anything is streamed.
+        :return: generator of str
+        """
+        if self.dropLowest:
+            raise Exception('The dice option dropLowest can not be used when streaming rolls')
+        # A list of ints prints as valid JSON so each line is formatted directly instead of calling json.dumps.
+        prefix = '{' if rollID is None else f'{json.dumps({"rollID": rollID})[:-1]}, '
+
+        def _stream():
+            remaining = max(self.repeatRoll, 1)
+            while remaining > 0:
+                count = min(remaining, chunkSize)
+                remaining -= count
+                rolls = DieRoller._finish_rolls(self.roll_matrix(count), self.signs, subAll=self.subAll,
+                                                addAll=self.addAll)
+                yield ''.join(f'{prefix}"Total": {roll["Total"]}, "Dice": {roll["Dice"]}}}\n'
+                              for roll in rolls['Rolls'])
+
+        return _stream()
+
+
 class DieAnalyzer(object):
     """
         This is designed to take input from API calls. There are 3 routes to rolling that all come here.
@@ -748,15 +1495,19 @@ class DieAnalyzer(object):
             7) The top keys are 'dice', 'diceOptions' and 'modifier'.
             8) An item in the 'dice' list should have 'id, 'dString', and can have 'modifier', 'connectorString',
                 and 'dieOptions'.
-            9) dieOptions are: 'dropLowest', 'rerollTotal', 'rerollDie'. 'subAll', 'addAll'.
+            9) dieOptions are: 'dropLowest', 'dropHighest', 'keepHighest', 'keepLowest', 'rerollTotal', 'rerollDie'.
+                'subAll', 'addAll'.
             10) diceOptions are: 'dropLowest', 'subAll', 'addAll', 'repeatRoll'
 
         dropLowest: (default value: False) This can be either False, True, or Int. True == 1. If True or 1 then this
             causes the roller to drop the lowest die before totalling the value. If the number is higher than 1 then
             it will drop the lowest die X number of times.
+        dropHighest: (default value: False) The same as dropLowest except the highest die are dropped.
+        keepHighest: (default value: False) This needs to be an integer. Only the highest X die are totalled.
+        keepLowest: (default value: False) This needs to be an integer. Only the lowest X die are totalled.
         rerollTotal: (default value: False) This needs to be an integer. This will cause the roller to reroll the
-            dice if the die is below a certain value. This will attempt to reroll 101 times. Currently, there is no
-            logic to control the number of reroll attempts.
+            dice if the total is equal to or below a certain value. The total is picked directly from the totals above
+            that value so only one roll is ever needed.
         rerollDie: (default value: False) This has to be an Int or a list of Ints. This will actually remove that Int
             or list of Ints from the possible roll of the die. So that when the die is rolled it can never choose that
             number.
@@ -765,13 +1516,84 @@ class DieAnalyzer(object):
         addAll: (default value: 0) This has to be an Int. This acts like subAll. It  adjusts the probability range of
             ALL die to be rolled by adding the Int value off ALL possible numbers before rolling.
         repeatRoll: (default value: False) This has to be an Int. This will take each die give in the 'dices' list
-            and preform the same action Int number of times. Max 10. The return json will look as if the request was
+            and preform the same action Int number of times. Max 10000. The return json will look as if the request was
             originally submitted asking for each roll. (Helpful for when testing)
     """
 
+    planCache = LRUCache(maxSize=planCacheSize, maxBytes=planCacheBytes)
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def canonical_die_str(dString):
+        """
+            The form of a die string that die_str_analyzer would see with every die given an explicit count. So 'd20',
+            '1d20' and ' 1D20 ' are all '1d20'.
+        """
+        dString = ''.join(dString.split()).strip('+').strip('-').lower()
+        return re.sub(r'(^|[+-])d', r'\g<1>1d', dString)
+
+    @staticmethod
+    def _cached_plan(key, compiler):
+        try:
+            plan = DieAnalyzer.planCache.get(key)
+        except TypeError:
+            # Options that can not be hashed (IE: a list for rerollDie) are simply not cached.
+            return compiler()
+        if plan is None:
+            plan = compiler()
+            if plan is not None:
+                DieAnalyzer.planCache.set(key, plan)
+        return plan
+
+    @staticmethod
+    @timed('parse')
+    def compile_str(dString, dieOptions=None):
+        """
+            Analyze a die string into a RollPlan. Plans are cached by the canonical die string and die options so the
+            string is only parsed the first time it is seen.
+        :return: RollPlan
+        """
+        if dieOptions is None:
+            dieOptions = {}
+        dString = DieAnalyzer.canonical_die_str(dString)
+
+        def _compile():
+            die = DieAnalyzer.die_str_analyzer(dString, dieOptions)
+            return RollPlan(die[0], die[1], ())
+
+        return DieAnalyzer._cached_plan(('str', dString, tuple(sorted(dieOptions.items()))), _compile)
+
+    @staticmethod
+    @timed('parse')
+    def compile_json(dJSON):
+        """
+            Analyze a JSON roll into a RollPlan. Plans are cached by the JSON itself (minus 'rollID' and 'seed'). A
+            roll that can not be analyzed raises an Exception that says what is wrong with it.
+        :return: RollPlan
+        """
+        return DieAnalyzer.compile_decoded(decode_roll_request(dJSON))
+
+    @staticmethod
+    def compile_decoded(roll, key=None):
+        """
+            compile_json for a roll that has already been through decode_roll_request. 'roll' is used up by this (the
+            analyzer pops its options) so pass a copy if it is needed after.
+        :param key: roll_key of 'roll' without 'rollID' and 'seed' if the caller already has it
+        :return: RollPlan
+        """
+        roll.pop('rollID', None)
+        roll.pop('seed', None)
+        if key is None:
+            key = roll_key(roll)
+
+        def _compile():
+            dice = DieAnalyzer.die_json_analyzer(roll, decoded=True, raiseErrors=True)
+            return RollPlan(dice[0], dice[1], dice[2])
+
+        return DieAnalyzer._cached_plan(('json', key), _compile)
+
     @staticmethod
     def die_str_analyzer(dString, dieOptions=None):
 
@@ -815,7 +1637,12 @@ class DieAnalyzer(object):
         return dies, dieConnectors, ()
 
     @staticmethod
-    def die_json_analyzer(dJSON):
+    def die_json_analyzer(dJSON, decoded=False, raiseErrors=False):
+        """
+            Analyze a JSON roll into (dice, connectors, diceOptions) or None if it can not be analyzed. Pass
+            decoded=True when 'dJSON' came from decode_roll_request to skip decoding it again, it will be changed.
+            Pass raiseErrors=True to get the Exception saying why it could not be analyzed instead of None.
+        """
 
         def _sortHelper(i):
             return i.get('id')
@@ -823,8 +1650,8 @@ class DieAnalyzer(object):
         try:
             dies = []
             dieConnectors = []
-            if isinstance(dJSON, str):
-                dJSON = json.loads(dJSON.strip(), object_hook=jsonHook)
+            if not decoded:
+                dJSON = decode_roll_request(dJSON)
             dice = sorted(dJSON.get('dice', list()), key=_sortHelper)
             diceOptions = tuple(parse_dice_options(dJSON.get('diceOptions', {})).items())
 
@@ -848,10 +1675,15 @@ class DieAnalyzer(object):
 
             return dies, list(filter(None, dieConnectors)), diceOptions
         except Exception as e:
+            if raiseErrors:
+                raise
             print(f"Error: {e}:{getStackTrace()}")
             return None
 
 
+cacheSync.register('planCache', DieAnalyzer.planCache)
+
+
 class Rolling(object):
     """
         This class is best used imported into another python project as a library.
@@ -862,13 +1694,11 @@ class Rolling(object):
 
     @staticmethod
     def roller(die, dieOptions):
-        die = DieAnalyzer.die_str_analyzer(die, dieOptions)
-        return DieRoller.roll_dice(dice=die[0], connectors=die[1], diceOptions={})
+        return DieAnalyzer.compile_str(die, dieOptions).roll()
 
     @staticmethod
     def json_roller(dJson):
-        dice = DieAnalyzer.die_json_analyzer(dJson)
-        return DieRoller.roll_dice(dice=dice[0], connectors=dice[1], diceOptions=dice[2])
+        return DieAnalyzer.compile_json(dJson).roll()
 
     @staticmethod
     def d2(**kwargs):
@@ -962,6 +1792,26 @@ class Rolling(object):
         return Rolling.json_roller(roll)
 
 
+def warm_caches(maxCount=4):
+    """
+        Build the roll plans and alias tables of the common rolls ahead of time. Called in the gunicorn master before
+        workers are forked so they all start with the same warm caches shared copy-on-write.
+    :param maxCount: int every die in DiePicker.diceDict is warmed from 1 to 'maxCount' dice
+    :return: int number of plans in the plan cache
+    """
+    plans = [DieAnalyzer.compile_str(f'{count}d{die}') for die in DiePicker.diceDict for count in range(1, maxCount+1)]
+    plans.append(DieAnalyzer.compile_str('4d6', {'dropLowest': 1}))
+    plans.append(DieAnalyzer.compile_str('2d20', {'keepHighest': 1}))
+    plans.append(DieAnalyzer.compile_str('2d20', {'keepLowest': 1}))
+    for plan in plans:
+        for term in plan.terms:
+            term.distribution.aliasLists
+    for characterStats in (Rolling.LowFantasyCharacterStats, Rolling.NormalCharacterStats,
+                           Rolling.HighFantasyCharacterStats):
+        characterStats()
+    return len(DieAnalyzer.planCache)
+
+
 def getStackTrace():
     """
         This is a useful troubleshooting tool
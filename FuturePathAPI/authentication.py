@@ -7,15 +7,37 @@
 # Description:
 
 
-from flask import jsonify, abort, request
-from FuturePathAPI.initApp import app, END_POINT
+from flask import jsonify, abort, request, Blueprint
+from FuturePathAPI.initApp import END_POINT
 from flask_login import LoginManager, login_required, current_user
-from FuturePathAPI.libs.MongoDataBase import User, UserManager
+from FuturePathAPI.libs.MongoDataBase import User, UserManager, resetRedis, resetMongo
+from FuturePathAPI.libs.Tokens import verify_token, revoke_token, revocationList
+from FuturePathAPI.libs.Passwords import PasswordPoolBusy
 
 
+blueprint = Blueprint('authentication', __name__)
 login_manager = LoginManager()
-login_manager.init_app(app)
-um = UserManager()
+um = None
+
+
+def getUserManager():
+    """
+        The UserManager of this process. It is made on first use rather than at import so building the app does not
+        open a Mongo or Redis connection that forked workers would end up sharing.
+    """
+    global um
+    if um is None:
+        um = UserManager()
+    return um
+
+
+def reset_connections():
+    """ Forget the Mongo and Redis connections of this process. Called in each gunicorn worker after it is forked. """
+    global um
+    um = None
+    resetMongo()
+    resetRedis()
+    revocationList.reset()
 
 
 authentication_tasks = [
@@ -31,6 +53,12 @@ authentication_tasks = [
         'name': u'test',
         'description': u'Test your token works correctly. A valid response to should "{"Auth": "Auth Test"}"',
         'uri': f"{END_POINT}/login/protected"
+    },
+    {
+        'id': 3,
+        'name': u'Logout',
+        'description': u'With a POST command and a valid TOKEN the token is revoked and will no longer work.',
+        'uri': f"{END_POINT}/logout"
     }
 ]
 
@@ -48,7 +76,7 @@ def user_required(func):
     return func_wrapper
 
 
-@app.route('/login/protected', methods=['GET'])
+@blueprint.route('/login/protected', methods=['GET'])
 @login_required
 def testAuth():
     """
@@ -62,20 +90,45 @@ def testAuth():
     return jsonify({'Auth': "Auth Test"}), 200
 
 
-@login_manager.request_loader
-def load_user(data, *args, **kwargs):
+def _request_token(data):
     token = data.headers.get('Token')
-    if token is None:
-        token = data.args.get('Token')
+    return token if token is not None else data.args.get('Token')
 
+
+@login_manager.request_loader
+def load_user(data, *args, **kwargs):
+    token = _request_token(data)
     if token is not None:
-        username = um.checkToken(token)
+        username = verify_token(token)
         if username:
             return User(username)
     return None
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@blueprint.route('/logout', methods=['POST'])
+@login_required
+def logout():
+    """
+    :OPTIONS: POST
+    :PATH: /logout
+    :HEADERS: Token
+    :DESC: Revokes the provided token so it can not be used again. Workers notice within a few seconds.
+    :Content-Type: application/json
+    """
+    token = _request_token(request)
+    try:
+        revoke_token(token)
+    except Exception as e:
+        return jsonify({'Exception': "There was a failure of some kind the exception is: %s" % e}), 500
+    try:
+        getUserManager().clearToken(current_user.username, token)
+    except Exception as e:
+        # The token is already revoked and login checks the revocation list before handing a stored token back.
+        print(f"ERROR: Unable to clear the stored token of {current_user.username}: {e}")
+    return jsonify({'Logout': "The token has been revoked"}), 200
+
+
+@blueprint.route('/login', methods=['GET', 'POST'])
 def authentication():
     """
     :OPTIONS: GET, POST
@@ -96,7 +149,9 @@ def authentication():
     if not username or not password:
         return jsonify({'Malformed': "This request was malformed!"}), 400
     try:
-        token = um.login(username, password)
+        token = getUserManager().login(username, password)
+    except PasswordPoolBusy as e:
+        return jsonify({'Busy': "%s" % e}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'Exception': "There was a failure of some kind the exception is: %s" % e}), 500
     if token:
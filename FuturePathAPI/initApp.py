@@ -8,6 +8,8 @@
 
 
 from flask import Flask, jsonify, make_response
+from werkzeug.middleware.proxy_fix import ProxyFix
+from FuturePathAPI.libs.jsonTools import FastJSONProvider
 import os
 
 # For Testing only
@@ -17,14 +19,47 @@ import os
 BASE_URL = "http://api.d20futurepath.com"
 PREFIX_VER = "/v1"
 END_POINT = f"{BASE_URL}{PREFIX_VER}"
+# gunicorn only listens on loopback so requests come through the reverse proxy. The client's address is taken from the
+# X-Forwarded-For entry this many proxies back. 0 uses the address of the connection itself.
+PROXY_HOPS = int(os.environ.get('FUTUREPATH_PROXY_HOPS') or 1)
 
 
-app = Flask(__name__)
-app.secret_key = os.urandom(16)
-# For testing only
-# CORS(app)  # Commit out
-
-
-@app.errorhandler(404)
 def not_found(error):
     return make_response(jsonify({'error': 'Not found'}), 404)
+
+
+def bad_request(error):
+    return make_response(jsonify({'error': error.description}), 400)
+
+
+def create_app(warm=False):
+    """
+        Build the Flask app and register every blueprint. Nothing here opens a database connection, those are made the
+        first time a worker needs them, so the app can be built once in the gunicorn master (preload_app) and shared
+        with the workers it forks.
+    :param warm: bool build the common distributions and roll plans now rather than on the first request
+    :return: Flask
+    """
+    from FuturePathAPI import FuturePathMain, authentication, user, tasks, Rolling, metrics
+    from FuturePathAPI.libs import Instrumentation
+    from FuturePathAPI.libs.Admission import CostError, cost_error
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    if PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
+    app.secret_key = os.urandom(16)
+    # For testing only
+    # CORS(app)  # Commit out
+
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(400, bad_request)
+    app.register_error_handler(CostError, cost_error)
+    authentication.login_manager.init_app(app)
+    Instrumentation.init_app(app)
+    for module in (FuturePathMain, authentication, user, tasks, Rolling, metrics):
+        app.register_blueprint(module.blueprint)
+
+    if warm:
+        Rolling.warm_caches()
+    return app
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Cost budgets that reject roll requests before they spend the CPU.
+
+
+import os
+import threading
+from flask import jsonify
+
+
+class CostError(Exception):
+    """ A request that is over a cost budget. 'status' is the HTTP status code to answer with. """
+
+    def __init__(self, message, status, cost=0, budget=0):
+        super(CostError, self).__init__(message)
+        self.status = status
+        self.cost = cost
+        self.budget = budget
+
+
+class Reservation(object):
+    """ Cost held against a CostBudget until release() is called. Releasing more than once does nothing. """
+
+    def __init__(self, budget, cost):
+        self.budget = budget
+        self.cost = cost
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.budget._release(self.cost)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+        return False
+
+
+class CostBudget(object):
+    """
+        Limits on the estimated cost of a request. A unit is roughly 10ns of work so 100 million is in the order of a
+        second. The defaults let a plain 1000000 roll stream through but not a keep/reroll roll of a hundred d100.
+
+        maxBuildCost: The most work one request can cause to build distributions for a plan that is not cached yet or
+            for '/tasks/probability'. Over this is a 422 since the combination of dice and options is the problem.
+        maxRequestCost: The most work one request can spend rolling. Over this is a 413.
+        maxWorkerCost: The most rolling work this process will have in flight across all of its threads. A request
+            that would go over this while others are running gets a 503 and should be retried. A request on its own
+            is always let in so long as it is under maxRequestCost.
+    """
+
+    def __init__(self, maxBuildCost=2 * 10 ** 8, maxRequestCost=4 * 10 ** 8, maxWorkerCost=8 * 10 ** 8):
+        self.maxBuildCost = maxBuildCost
+        self.maxRequestCost = maxRequestCost
+        self.maxWorkerCost = maxWorkerCost
+        self.inFlight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def configure(self, maxBuildCost=None, maxRequestCost=None, maxWorkerCost=None):
+        if maxBuildCost is not None:
+            self.maxBuildCost = int(maxBuildCost)
+        if maxRequestCost is not None:
+            self.maxRequestCost = int(maxRequestCost)
+        if maxWorkerCost is not None:
+            self.maxWorkerCost = int(maxWorkerCost)
+
+    def _reject(self, message, status, cost, budget):
+        with self._lock:
+            self.rejected += 1
+        raise CostError(message, status, cost, budget)
+
+    def check_build(self, cost):
+        if cost > self.maxBuildCost:
+            self._reject(f'Building the odds of these dice would cost {cost} which is over the limit of '
+                         f'{self.maxBuildCost}. Use fewer or smaller dice or fewer drop/keep/reroll options.',
+                         422, cost, self.maxBuildCost)
+
+    def check_request(self, cost):
+        if cost > self.maxRequestCost:
+            self._reject(f'Rolling this request would cost {cost} which is over the limit of {self.maxRequestCost}. '
+                         f'Lower repeatRoll or the number of dice.', 413, cost, self.maxRequestCost)
+
+    def reserve(self, cost):
+        """
+            Check 'cost' against maxRequestCost and hold it against maxWorkerCost until the returned Reservation is
+            released. Works as a context manager.
+        :return: Reservation
+        """
+        self.check_request(cost)
+        with self._lock:
+            if self.inFlight and self.inFlight + cost > self.maxWorkerCost:
+                self.rejected += 1
+                raise CostError(f'This worker is too busy to roll a request that costs {cost}. Try again shortly.',
+                                503, cost, self.maxWorkerCost)
+            self.inFlight += cost
+        return Reservation(self, cost)
+
+    def _release(self, cost):
+        with self._lock:
+            self.inFlight -= cost
+
+    def stats(self):
+        with self._lock:
+            return {'inFlight': self.inFlight, 'rejected': self.rejected, 'maxBuildCost': self.maxBuildCost,
+                    'maxRequestCost': self.maxRequestCost, 'maxWorkerCost': self.maxWorkerCost}
+
+
+def cost_error(error):
+    """ Flask error handler for CostError. """
+    response = jsonify({'Error': f'{error}', 'Cost': error.cost, 'Budget': error.budget})
+    response.status_code = error.status
+    if error.status == 503:
+        response.headers['Retry-After'] = '1'
+    return response
+
+
+costBudget = CostBudget()
+costBudget.configure(maxBuildCost=os.environ.get('FUTUREPATH_MAX_BUILD_COST'),
+                     maxRequestCost=os.environ.get('FUTUREPATH_MAX_REQUEST_COST'),
+                     maxWorkerCost=os.environ.get('FUTUREPATH_MAX_WORKER_COST'))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Array backed probability distributions for summing dice.
+
+
+import numpy
+from math import comb
+from FuturePathAPI.libs.RandomGenerator import get_generator
+
+
+# When the product of the two array lengths passes this number convolution is done with an FFT instead of directly.
+fftThreshold = 1 << 16
+
+
+def convolve(first, second):
+    """
+        Convolve two probability vectors. Small inputs use numpy.convolve which is exact, large inputs use an FFT
+        which is O(n log n) but can leave tiny negative values behind that are clipped away.
+    :param first: numpy array of probabilities
+    :param second: numpy array of probabilities
+    :return: numpy array of length len(first) + len(second) - 1
+    """
+    if len(first) * len(second) <= fftThreshold:
+        return numpy.convolve(first, second)
+    size = len(first) + len(second) - 1
+    fftSize = 1 << (size - 1).bit_length()
+    output = numpy.fft.irfft(numpy.fft.rfft(first, fftSize) * numpy.fft.rfft(second, fftSize), fftSize)[:size]
+    numpy.clip(output, 0.0, None, out=output)
+    return output / output.sum()
+
+
+class Distribution(object):
+    """
+        A compact distribution of integer outcomes. 'offset' is the lowest possible outcome and 'probabilities[i]' is
+        the chance of getting 'offset + i'. Sums of dice are built by convolving these arrays together.
+    """
+
+    def __init__(self, offset=0, probabilities=None):
+        self.offset = int(offset)
+        if probabilities is None:
+            probabilities = numpy.ones(1)
+        self.probabilities = numpy.asarray(probabilities, dtype=numpy.float64)
+        self._aliasTable = None
+        self._aliasLists = None
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def __repr__(self):
+        return f'<Distribution {self.minimum}..{self.maximum}>'
+
+    @classmethod
+    def from_faces(cls, faces):
+        """
+            Build the distribution of a single die from the numbers printed on its faces. Each face is equally likely
+            and faces do not have to be contiguous (IE: a die with rerollDie applied).
+        :param faces: iterable of ints
+        :return: Distribution
+        """
+        faces = numpy.asarray(tuple(faces), dtype=numpy.int64)
+        if not faces.size:
+            raise Exception('A die needs at least one face to build a distribution')
+        offset = int(faces.min())
+        counts = numpy.bincount(faces - offset).astype(numpy.float64)
+        return cls(offset, counts / faces.size)
+
+    @property
+    def minimum(self):
+        return self.offset
+
+    @property
+    def maximum(self):
+        return self.offset + len(self.probabilities) - 1
+
+    @property
+    def values(self):
+        return numpy.arange(self.offset, self.offset + len(self.probabilities), dtype=numpy.int64)
+
+    @property
+    def mean(self):
+        return float(numpy.dot(self.values, self.probabilities))
+
+    @property
+    def variance(self):
+        return float(numpy.dot((self.values - self.mean) ** 2, self.probabilities))
+
+    @property
+    def cdf(self):
+        cdf = numpy.cumsum(self.probabilities)
+        return numpy.minimum(cdf / cdf[-1], 1.0)
+
+    def percentile(self, percent):
+        """ The lowest outcome whose cumulative probability reaches 'percent' (0 - 100). """
+        index = int(numpy.searchsorted(self.cdf, percent / 100.0 - 1e-12))
+        return self.offset + min(index, len(self.probabilities) - 1)
+
+    @property
+    def nbytes(self):
+        if self._aliasTable is None:
+            return self.probabilities.nbytes
+        return self.probabilities.nbytes + self._aliasTable[0].nbytes + self._aliasTable[1].nbytes
+
+    @property
+    def cachedBytes(self):
+        """
+            An estimate of the memory this distribution uses once its alias table is built. The table is a float and
+            an int array plus the same values as Python lists.
+        """
+        return len(self.probabilities) * 96
+
+    @property
+    def aliasTable(self):
+        """
+            Walker/Vose alias table for this distribution as a (probability, alias) pair of arrays. Built once on first
+            use and then reused so each draw is O(1).
+        """
+        if self._aliasTable is None:
+            self._aliasTable = self._build_alias_table(self.probabilities)
+        return self._aliasTable
+
+    @property
+    def aliasLists(self):
+        """ The alias table as Python lists. Indexing a list is much faster than a numpy array for single draws. """
+        if self._aliasLists is None:
+            prob, alias = self.aliasTable
+            self._aliasLists = prob.tolist(), alias.tolist()
+        return self._aliasLists
+
+    @staticmethod
+    def _build_alias_table(probabilities):
+        size = len(probabilities)
+        scaled = (probabilities / probabilities.sum() * size).tolist()
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Anything left over is 1.0 give or take floating point error.
+        prob = numpy.array(prob, dtype=numpy.float64)
+        alias = numpy.array(alias, dtype=numpy.int64)
+        return prob, alias
+
+    def draw(self):
+        """
+            A single random outcome using the alias table. This is one uniform random number from the thread's
+            Generator and two list lookups.
+        :return: int
+        """
+        prob, alias = self.aliasLists
+        u = get_generator().random() * len(prob)
+        index = int(u)
+        if u - index < prob[index]:
+            return self.offset + index
+        return self.offset + alias[index]
+
+    def sample(self, count):
+        """
+            Many random outcomes at once using the alias table.
+        :param count: int
+        :return: numpy array of int64
+        """
+        prob, alias = self.aliasTable
+        u = get_generator().random(int(count)) * len(prob)
+        index = u.astype(numpy.int64)
+        return numpy.where(u - index < prob[index], index, alias[index]) + self.offset
+
+    def condition_above(self, threshold):
+        """
+            The distribution of this one given the outcome is higher than 'threshold'. Raises ValueError if no outcome
+            can be higher than 'threshold'.
+        """
+        start = max(int(threshold) + 1 - self.offset, 0)
+        tail = self.probabilities[start:]
+        mass = tail.sum()
+        if not tail.size or mass <= 0:
+            raise ValueError(f'No outcome is higher than {threshold}')
+        return Distribution(self.offset + start, tail / mass)
+
+    def add(self, other):
+        """ The distribution of the sum of an outcome from this and an independent outcome from 'other'. """
+        return Distribution(self.offset + other.offset, convolve(self.probabilities, other.probabilities))
+
+    def negate(self):
+        return Distribution(-self.maximum, self.probabilities[::-1].copy())
+
+    def subtract(self, other):
+        return self.add(other.negate())
+
+    def shift(self, amount):
+        shifted = Distribution(self.offset + int(amount), self.probabilities)
+        shifted._aliasTable, shifted._aliasLists = self._aliasTable, self._aliasLists
+        return shifted
+
+    def power(self, repeat):
+        """
+            The distribution of the sum of 'repeat' independent outcomes. This uses repeated squaring so only
+            O(log repeat) convolutions are needed.
+        :param repeat: int
+        :return: Distribution
+        """
+        repeat = int(repeat)
+        if repeat < 0:
+            raise Exception('Cannot sum a negative number of dice')
+        result = Distribution()
+        base = self
+        while repeat:
+            if repeat & 1:
+                result = result.add(base)
+            repeat >>= 1
+            if repeat:
+                base = base.add(base)
+        return result
+
+
+def keep_sum(single, count, low=0, high=0):
+    """
+        The distribution of the total of 'count' independent rolls of 'single' after the 'low' lowest and 'high' highest
+        rolls are removed. Rather than enumerating every roll this walks the faces from lowest to highest keeping track
+        of how many dice have been placed and the total of the ones that land in the kept positions. Each step weights
+        placing 'c' dice on a face by comb(remaining, c) * p^c, which adds up to the multinomial probability.
+    :param single: Distribution of one die
+    :param count: int number of dice rolled
+    :param low: int number of the lowest dice dropped
+    :param high: int number of the highest dice dropped
+    :return: Distribution
+    """
+    kept = count - low - high
+    if kept <= 0:
+        raise Exception('The number of dice to drop is greater then or equal to the number of requested dice to roll')
+    span = kept * (len(single) - 1) + 1
+    table = numpy.zeros((count + 1, span))
+    table[0, 0] = 1.0
+    for face, prob in enumerate(single.probabilities):
+        if not prob:
+            continue
+        nextTable = numpy.zeros((count + 1, span))
+        for placed in range(count + 1):
+            if not table[placed].any():
+                continue
+            for c in range(count - placed + 1):
+                weight = comb(count - placed, c) * prob ** c
+                shift = max(0, min(placed + c, count - high) - max(placed, low)) * face
+                nextTable[placed + c, shift:] += weight * table[placed, :span - shift]
+        table = nextTable
+    return Distribution(kept * single.offset, table[count])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: A precomputed table of distributions that is memory-mapped and shared between processes.
+
+
+import os
+import json
+import numpy
+import logging
+
+
+log = logging.getLogger('DistributionTable')
+INDEX_FILE = 'index.json'
+PROBABILITIES_FILE = 'probabilities.npy'
+ALIAS_PROB_FILE = 'aliasProb.npy'
+ALIAS_FILE = 'alias.npy'
+
+
+def tableKey(die, repeat):
+    """ The key of the distribution of rolling the faces 'die' 'repeat' times. IE: '1,2,3,4x2' for 2d4. """
+    return f"{','.join(str(face) for face in die)}x{int(repeat)}"
+
+
+def write_table(directory, distributions):
+    """
+        Write distributions into 'directory' as three flat .npy arrays (probabilities, alias probabilities and alias
+        indexes) and an index.json of key -> [offset, start, length]. The alias tables are stored as well so workers do
+        not have to build them.
+    :param directory: str path to the directory, created if needed
+    :param distributions: dict of tableKey -> Distribution
+    :return: int number of distributions written
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = {}
+    probabilities, aliasProbs, aliases = [], [], []
+    start = 0
+    for key, dist in distributions.items():
+        prob, alias = dist.aliasTable
+        index[key] = [dist.offset, start, len(dist)]
+        probabilities.append(dist.probabilities)
+        aliasProbs.append(prob)
+        aliases.append(alias)
+        start += len(dist)
+
+    def _concat(arrays, dtype):
+        return numpy.concatenate(arrays).astype(dtype) if arrays else numpy.empty(0, dtype=dtype)
+
+    numpy.save(os.path.join(directory, PROBABILITIES_FILE), _concat(probabilities, numpy.float64))
+    numpy.save(os.path.join(directory, ALIAS_PROB_FILE), _concat(aliasProbs, numpy.float64))
+    numpy.save(os.path.join(directory, ALIAS_FILE), _concat(aliases, numpy.int64))
+    # The index is written last so a reader never sees an index pointing past the end of the arrays.
+    with open(os.path.join(directory, INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+    return len(index)
+
+
+class DistributionTable(object):
+    """
+        A read only table of distributions written by write_table. The arrays are opened with numpy's mmap_mode so every
+        process that loads the same files shares them through the OS page cache rather than each keeping a copy.
+        Anything not in the table is left to the caller to build.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.directory = None
+        self._probabilities = None
+        self._aliasProbs = None
+        self._aliases = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def load(self, directory):
+        """
+            Memory-map the table in 'directory'. A missing or unreadable table is logged and leaves the table empty.
+        :return: bool True if the table was loaded
+        """
+        try:
+            with open(os.path.join(directory, INDEX_FILE), 'r') as f:
+                index = json.load(f)
+            probabilities = numpy.load(os.path.join(directory, PROBABILITIES_FILE), mmap_mode='r')
+            aliasProbs = numpy.load(os.path.join(directory, ALIAS_PROB_FILE), mmap_mode='r')
+            aliases = numpy.load(os.path.join(directory, ALIAS_FILE), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            log.debug(f'No distribution table loaded from {directory}: {e}')
+            return False
+        self._probabilities, self._aliasProbs, self._aliases = probabilities, aliasProbs, aliases
+        self.index = index
+        self.directory = directory
+        return True
+
+    def fill(self, dist, die, repeat):
+        """
+            Point 'dist' at the table's arrays for rolling 'die' 'repeat' times. The arrays are read only views into
+            the memory map.
+        :param dist: Distribution (or subclass) to fill in
+        :return: bool False if the table does not have it
+        """
+        entry = self.index.get(tableKey(die, repeat))
+        if entry is None:
+            return False
+        offset, start, length = entry
+        end = start + length
+        dist.offset = offset
+        dist.probabilities = self._probabilities[start:end]
+        dist._aliasTable = self._aliasProbs[start:end], self._aliases[start:end]
+        return True
+
+
+distributionTable = DistributionTable()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Prometheus histograms of request phases and cache counters that aggregate across gunicorn workers.
+
+
+import os
+import time
+import threading
+from flask import request
+from FuturePathAPI.libs.jsonTools import FastJSONProvider
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+
+# prometheus_client switches to one file per process in this directory when it is set before the import above.
+MULTIPROC_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+phases = ('parse', 'distribution', 'sample', 'serialize', 'redis', 'mongo', 'password')
+buckets = (.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5)
+syncInterval = 1.0
+
+
+if prometheus_client is not None:
+    PHASE_SECONDS = prometheus_client.Histogram('futurepath_phase_seconds', 'Time spent in each phase of a request',
+                                                ['phase'], buckets=buckets)
+    REQUEST_SECONDS = prometheus_client.Histogram('futurepath_request_seconds', 'Time to answer a request',
+                                                  ['endpoint', 'method', 'status'], buckets=buckets)
+    CACHE_HITS = prometheus_client.Counter('futurepath_cache_hits', 'Cache lookups that found a value', ['cache'])
+    CACHE_MISSES = prometheus_client.Counter('futurepath_cache_misses', 'Cache lookups that did not', ['cache'])
+    CACHE_EVICTIONS = prometheus_client.Counter('futurepath_cache_evictions', 'Values removed to make room',
+                                                ['cache'])
+    CACHE_ITEMS = prometheus_client.Gauge('futurepath_cache_items', 'Values held by the cache', ['cache'],
+                                          multiprocess_mode='livesum')
+    CACHE_BYTES = prometheus_client.Gauge('futurepath_cache_bytes', 'Estimated bytes held by the cache', ['cache'],
+                                          multiprocess_mode='livesum')
+    CACHE_HIT_RATIO = prometheus_client.Gauge('futurepath_cache_hit_ratio', 'Hits over lookups of each process',
+                                              ['cache'], multiprocess_mode='liveall')
+    REDIS_POOL_WAIT = prometheus_client.Histogram('futurepath_redis_pool_wait_seconds',
+                                                  'Time spent waiting for a pooled Redis connection', buckets=buckets)
+    REDIS_POOL_FAILURES = prometheus_client.Counter('futurepath_redis_pool_failures',
+                                                    'Times no Redis connection was free in time or one could not '
+                                                    'connect')
+    REDIS_POOL_IN_USE = prometheus_client.Gauge('futurepath_redis_pool_in_use', 'Redis connections checked out',
+                                                multiprocess_mode='livesum')
+    REDIS_POOL_MAX = prometheus_client.Gauge('futurepath_redis_pool_max', 'Redis connections the pools can open',
+                                             multiprocess_mode='livesum')
+    _phaseTimers = {phase: PHASE_SECONDS.labels(phase) for phase in phases}
+else:
+    _phaseTimers = {}
+
+
+class _NoTimer(object):
+    """ Stands in for a histogram timer when metrics are off so 'with timed(...)' costs next to nothing. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __call__(self, func):
+        return func
+
+
+_noTimer = _NoTimer()
+
+
+def enabled():
+    return prometheus_client is not None
+
+
+def timed(phase):
+    """
+        Time a phase into futurepath_phase_seconds. Works as a context manager or a decorator. Phases can nest (IE: a
+        'distribution' built while a plan is parsed is counted in both).
+    :param phase: str one of 'phases' or None to not time anything
+    """
+    histogram = _phaseTimers.get(phase)
+    if histogram is None:
+        return _noTimer
+    return histogram.time()
+
+
+def pool_sized(size):
+    """ A Redis connection pool of 'size' was made for this process. """
+    if prometheus_client is not None:
+        REDIS_POOL_MAX.set(size)
+
+
+def pool_checkout(seconds, acquired=True):
+    """ A caller waited 'seconds' for a Redis connection and got one unless 'acquired' is False. """
+    if prometheus_client is not None:
+        REDIS_POOL_WAIT.observe(seconds)
+        if acquired:
+            REDIS_POOL_IN_USE.inc()
+        else:
+            REDIS_POOL_FAILURES.inc()
+
+
+def pool_checkin():
+    if prometheus_client is not None:
+        REDIS_POOL_IN_USE.dec()
+
+
+class TimedJSONProvider(FastJSONProvider):
+    """ The app's JSON provider with the time spent building JSON responses recorded as the 'serialize' phase. """
+
+    def response(self, *args, **kwargs):
+        with timed('serialize'):
+            return super(TimedJSONProvider, self).response(*args, **kwargs)
+
+
+class CacheSync(object):
+    """
+        Copies the counters of caches with a stats() method (LRUCache and Memorizer) into Prometheus. Counters are
+        only increased by how much they changed since the last sync so they add up correctly across processes. The
+        sync runs at most once every 'syncInterval' seconds and just before metrics are exported.
+    """
+
+    def __init__(self):
+        self.caches = {}
+        self._last = {}
+        self._lastSync = 0.0
+        self._lock = threading.Lock()
+
+    def register(self, name, cache):
+        self.caches[name] = cache
+
+    def reset(self):
+        """
+            Zero the counters of every cache and forget what was synced. Called in each gunicorn worker after it is
+            forked so the lookups made while the master warmed the caches are not counted again by every worker.
+        """
+        self._lock = threading.Lock()
+        for cache in self.caches.values():
+            cache.reset_stats()
+        self._last = {}
+        self._lastSync = 0.0
+
+    def sync(self, force=False):
+        if prometheus_client is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._lastSync < syncInterval:
+            return
+        with self._lock:
+            self._lastSync = now
+            for name, cache in self.caches.items():
+                stats = cache.stats()
+                last = self._last.get(name, {'hits': 0, 'misses': 0, 'evictions': 0})
+                CACHE_HITS.labels(name).inc(max(stats['hits'] - last['hits'], 0))
+                CACHE_MISSES.labels(name).inc(max(stats['misses'] - last['misses'], 0))
+                CACHE_EVICTIONS.labels(name).inc(max(stats['evictions'] - last['evictions'], 0))
+                CACHE_ITEMS.labels(name).set(stats['size'])
+                CACHE_BYTES.labels(name).set(stats['bytes'])
+                CACHE_HIT_RATIO.labels(name).set(stats['hitRatio'])
+                self._last[name] = stats
+
+
+cacheSync = CacheSync()
+
+
+def _before_request():
+    request.environ['futurepath.start'] = time.perf_counter()
+
+
+def _after_request(response):
+    start = request.environ.get('futurepath.start')
+    if start is not None:
+        REQUEST_SECONDS.labels(request.endpoint or 'unknown', request.method,
+                               str(response.status_code)).observe(time.perf_counter() - start)
+    cacheSync.sync()
+    return response
+
+
+def init_app(app):
+    """ Time every request of 'app' and its JSON serialization. Does nothing when prometheus_client is missing. """
+    if prometheus_client is None:
+        return app
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    return app
+
+
+def export():
+    """
+        The metrics in Prometheus text format. When PROMETHEUS_MULTIPROC_DIR is set the values are read from the files
+        every worker writes, so any worker answering the scrape reports the totals of all of them.
+    :return: tuple (bytes, content type)
+    """
+    cacheSync.sync(force=True)
+    if os.environ.get(MULTIPROC_ENV):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """ Remove the live gauges of a worker that exited. Called from gunicorn's child_exit hook. """
+    if prometheus_client is not None and os.environ.get(MULTIPROC_ENV):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: A thread safe least recently used cache with size, byte and time limits.
+
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+def sizeOf(value):
+    """
+        A best guess at the memory used by 'value'. Objects can report their own size with a 'cachedBytes' or 'nbytes'
+        attribute (IE: numpy arrays) otherwise sys.getsizeof is used.
+    """
+    size = getattr(value, 'cachedBytes', None)
+    if size is None:
+        size = getattr(value, 'nbytes', None)
+    if size is None:
+        size = sys.getsizeof(value)
+    return int(size)
+
+
+class LRUCache(object):
+    """
+        A dict like cache that holds at most 'maxSize' items and, if 'maxBytes' is set, at most 'maxBytes' of values as
+        measured by 'sizeOf'. When it is full the least recently used items are removed. If 'ttl' is set items older
+        than 'ttl' seconds are treated as missing. Every method takes the same lock so it is safe to share between
+        threads. Keys are compared by equality like any dict.
+    """
+
+    def __init__(self, maxSize=1024, maxBytes=None, ttl=None, sizeOf=sizeOf):
+        self.maxSize = maxSize
+        self.maxBytes = maxBytes
+        self.ttl = ttl
+        self.sizeOf = sizeOf
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def _lookup(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _remove(self, key):
+        entry = self._cache.pop(key)
+        self.bytes -= entry[1]
+        return entry
+
+    def _evict(self):
+        while self._cache and (len(self._cache) > self.maxSize or
+                               (self.maxBytes is not None and self.bytes > self.maxBytes)):
+            _, entry = self._cache.popitem(last=False)
+            self.bytes -= entry[1]
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return entry[0]
+
+    def peek(self, key, default=None):
+        """ The same as get except the counters and the order of the cache are not changed. """
+        with self._lock:
+            entry = self._lookup(key)
+            return default if entry is None else entry[0]
+
+    def set(self, key, value):
+        size = self.sizeOf(value)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            self._cache[key] = (value, size, expires)
+            self.bytes += size
+            self._evict()
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._cache:
+                return default
+            return self._remove(key)[0]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.bytes = 0
+
+    def reset_stats(self):
+        """ Zero the hit, miss, eviction and expiration counters. The cached items are kept. """
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def resize(self, maxSize=None, maxBytes=None, ttl=None):
+        """ Change the limits of the cache. Only the limits that are passed are changed. """
+        with self._lock:
+            if maxSize is not None:
+                self.maxSize = maxSize
+            if maxBytes is not None:
+                self.maxBytes = maxBytes
+            if ttl is not None:
+                self.ttl = ttl or None
+            self._evict()
+
+    def stats(self):
+        """ The counters of the cache as a dict. """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hitRatio': self.hits / lookups if lookups else 0.0,
+                    'evictions': self.evictions,
+                    'expirations': self.expirations,
+                    'size': len(self._cache),
+                    'bytes': self.bytes,
+                    'maxSize': self.maxSize,
+                    'maxBytes': self.maxBytes,
+                    'ttl': self.ttl}
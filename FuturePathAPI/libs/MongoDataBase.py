@@ -7,22 +7,31 @@
 # Description:
 
 
+import os
+import time
 import yaml
 import redis
-import bcrypt
 import logging
 import traceback
-from pymongo import MongoClient
+from contextlib import contextmanager
+from pymongo import MongoClient, ASCENDING
 from flask_login import UserMixin
-from itsdangerous import URLSafeTimedSerializer as Serializer
 from FuturePathAPI import MAINDIR
+from FuturePathAPI.libs.Instrumentation import timed, pool_sized, pool_checkout, pool_checkin
+from FuturePathAPI.libs.Passwords import passwordPool, configure_from, PasswordPoolBusy
 
 
 log = logging.getLogger('MongoDB')
 DB_CONFIG = "/libs/db.yaml"
 REDIS_CONFIG = "/libs/redis.yaml"
 redisServer = None
+redisPid = None
+mongoClient = None
+mongoPid = None
 tokenExpire = 43200
+# Seconds before a failed index creation is tried again. It doubles after each failure up to maxIndexRetryDelay.
+indexRetryDelay = 60.0
+maxIndexRetryDelay = 3600.0
 
 
 def loadYaml(filename=''):
@@ -45,26 +54,150 @@ def loadYamlREDISConfig():
         return dict()
 
 
+class InstrumentedPool(redis.BlockingConnectionPool):
+    """
+        A BlockingConnectionPool that records how long callers wait for a connection, how many are checked out and
+        how often one could not be had (none was free within 'timeout' or it could not connect).
+    """
+
+    def reset(self):
+        super(InstrumentedPool, self).reset()
+        self._checkedOut = set()
+
+    def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            connection = super(InstrumentedPool, self).get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            pool_checkout(time.perf_counter() - start, acquired=False)
+            raise
+        self._checkedOut.add(id(connection))
+        pool_checkout(time.perf_counter() - start)
+        return connection
+
+    def release(self, connection):
+        # The pool also releases connections that failed to connect, those were never counted as checked out.
+        super(InstrumentedPool, self).release(connection)
+        if id(connection) in self._checkedOut:
+            self._checkedOut.discard(id(connection))
+            pool_checkin()
+
+
+def makeRedisPool(config):
+    """
+        The connection pool for this process from redis.yaml. Optional keys are: password, maxConnections (10),
+        poolTimeout (seconds to wait for a free connection, 1.0), connectTimeout (0.5), socketTimeout (0.5) and
+        healthCheckInterval (seconds a connection can sit idle before it is pinged on its next use, 30).
+    """
+    maxConnections = int(config.get('maxConnections') or 10)
+    pool = InstrumentedPool(max_connections=maxConnections, timeout=float(config.get('poolTimeout') or 1.0),
+                            host=config.get('host') or 'localhost', port=config.get('port') or 6379,
+                            db=config.get('db') or 0, password=config.get('password') or None,
+                            socket_connect_timeout=float(config.get('connectTimeout') or 0.5),
+                            socket_timeout=float(config.get('socketTimeout') or 0.5),
+                            health_check_interval=int(config.get('healthCheckInterval') or 30))
+    pool_sized(maxConnections)
+    return pool
+
+
 def getRedis(checkConn=False):
+    """
+        The Redis client of this process. It is made on first use with its own pool and made again if this process
+        was forked from the one that made it.
+    :param checkConn: ping the server first and return None if it can not be reached
+    """
     global redisServer
+    global redisPid
     global tokenExpire
-    if redisServer is not None:
-        if checkConn is False:
-            return redisServer
+    # A client set from outside (IE: a stand in for tests) has no pid and is left alone.
+    if redisServer is not None and redisPid is not None and redisPid != os.getpid():
+        resetRedis()
+    if redisServer is None:
+        config = loadYamlREDISConfig()
+        tokenExpire = config.get('expire', 43200)
+        redisServer = redis.StrictRedis(connection_pool=makeRedisPool(config))
+        redisPid = os.getpid()
+    if checkConn:
         try:
-            redisServer.ping()
-        except redis.ConnectionError as e:
-            print(e.message)
-            redisServer = None
-        finally:
-            return redisServer
-    config = loadYamlREDISConfig()
-    tokenExpire = config.get('expire', 43200)
-    redisServer = redis.StrictRedis(host=config.get('host', 'localhost'), port=config.get('port', 6379),
-                                    db=config.get('db', 0))
+            with timed('redis'):
+                redisServer.ping()
+        except redis.RedisError as e:
+            log.error(f'Unable to reach Redis: {e}')
+            resetRedis()
     return redisServer
 
 
+def resetRedis():
+    """ Drop the Redis client so the next getRedis makes a new one. Connections are not safe to share after a fork. """
+    global redisServer
+    global redisPid
+    redisServer = None
+    redisPid = None
+
+
+@contextmanager
+def redisPipeline(server=None, transaction=False):
+    """
+        Queue several Redis commands and send them in one round trip when the block ends. Nothing is sent if the block
+        raises.
+            with redisPipeline() as pipe:
+                pipe.zadd(...)
+                pipe.zremrangebyscore(...)
+    :param server: the client to use (default getRedis())
+    :param transaction: wrap the commands in MULTI/EXEC
+    """
+    pipe = (server or getRedis()).pipeline(transaction=transaction)
+    try:
+        yield pipe
+        with timed('redis'):
+            pipe.execute()
+    finally:
+        pipe.reset()
+
+
+def makeMongoClient(config, **kwargs):
+    """
+        A MongoClient from db.yaml with 'kwargs' taking precedence. It does not connect until it is first used. Optional
+        pool keys are: maxPoolSize (10), minPoolSize (0), waitQueueTimeoutMS (1000), serverSelectionTimeoutMS (2000),
+        connectTimeoutMS (2000) and socketTimeoutMS (2000).
+    """
+    def option(key, default):
+        value = kwargs.get(key, config.get(key))
+        return default if value is None else value
+
+    return MongoClient(host=option('host', '127.0.0.1'), port=option('port', 27017),
+                       username=option('username', 'server'), password=option('password', ''),
+                       authSource=option('authSource', 'admin'), maxPoolSize=int(option('maxPoolSize', 10)),
+                       minPoolSize=int(option('minPoolSize', 0)),
+                       waitQueueTimeoutMS=int(option('waitQueueTimeoutMS', 1000)),
+                       serverSelectionTimeoutMS=int(option('serverSelectionTimeoutMS', 2000)),
+                       connectTimeoutMS=int(option('connectTimeoutMS', 2000)),
+                       socketTimeoutMS=int(option('socketTimeoutMS', 2000)), connect=False)
+
+
+def getMongo():
+    """
+        The MongoClient of this process. Like getRedis it is made on first use and made again if this process was
+        forked from the one that made it, since a MongoClient is not safe to use across a fork.
+    """
+    global mongoClient
+    global mongoPid
+    if mongoClient is not None and mongoPid is not None and mongoPid != os.getpid():
+        resetMongo()
+    if mongoClient is None:
+        mongoClient = makeMongoClient(loadYamlDBConfig())
+        mongoPid = os.getpid()
+    return mongoClient
+
+
+def resetMongo():
+    """ Drop the MongoClient so the next getMongo makes a new one. """
+    global mongoClient
+    global mongoPid
+    mongoClient = None
+    mongoPid = None
+
+
 class MongoConnection(object):
 
     collections = ['usernames']
@@ -75,12 +208,9 @@ class MongoConnection(object):
 
     def __init__(self, databaseName, **kwargs):
         try:
-            config = loadYamlDBConfig()
-            self.connection = MongoClient(host=kwargs.get('host', config.get('host', '127.0.0.1')),
-                                          port=kwargs.get('port', config.get('port', 27017)),
-                                          username=kwargs.get('username', config.get('username', 'server')),
-                                          password=kwargs.get('password', config.get('password', '')),
-                                          authSource=kwargs.get('authSource', config.get('authSource', 'admin')))
+            # Connection settings in kwargs get a client of their own, otherwise the process's shared one is used.
+            clientKeys = {key: value for key, value in kwargs.items() if key != 'collection'}
+            self.connection = makeMongoClient(loadYamlDBConfig(), **clientKeys) if clientKeys else getMongo()
             self.db = self.connection[databaseName]
             self.defaultCollect = kwargs.get('collection', self.collections[0])
             self.dbName = databaseName
@@ -97,11 +227,11 @@ class MongoConnection(object):
     def insertOne(self, data, **kwargs):
         return self.db[kwargs.get('collection', self.defaultCollect)].insert_one(data).acknowledged
 
-    def find(self, data=None, **kwargs):
-        return self.db[kwargs.get('collection', self.defaultCollect)].find(data)
+    def find(self, data=None, projection=None, **kwargs):
+        return self.db[kwargs.get('collection', self.defaultCollect)].find(data, projection)
 
-    def findOne(self, data=None, **kwargs):
-        return self.db[kwargs.get('collection', self.defaultCollect)].find_one(data)
+    def findOne(self, data=None, projection=None, **kwargs):
+        return self.db[kwargs.get('collection', self.defaultCollect)].find_one(data, projection)
 
     def update(self, updateCriteria, data, **kwargs):
         updateType = {kwargs.get('updateType', '$set'): data}
@@ -109,7 +239,11 @@ class MongoConnection(object):
         return results.acknowledged and results.modified_count > 0
 
     def remove(self, data, **kwargs):
-        return self.db[kwargs.get('collection', self.defaultCollect)].remove(data).get('n', False)
+        return self.db[kwargs.get('collection', self.defaultCollect)].delete_many(data).deleted_count or False
+
+    def createIndex(self, keys, **kwargs):
+        collection = kwargs.pop('collection', self.defaultCollect)
+        return self.db[collection].create_index(keys, **kwargs)
 
     def drop(self, **kwargs):
         return self.db[kwargs.get('collection', self.defaultCollect)].drop()
@@ -150,11 +284,11 @@ class MongoCollection(object):
     def insertOne(self, data):
         return self.mongoConn.insertOne(data, collection=self.collection)
 
-    def find(self, data=None):
-        return self.mongoConn.find(data, collection=self.collection)
+    def find(self, data=None, projection=None):
+        return self.mongoConn.find(data, projection, collection=self.collection)
 
-    def findOne(self, data=None):
-        return self.mongoConn.findOne(data, collection=self.collection)
+    def findOne(self, data=None, projection=None):
+        return self.mongoConn.findOne(data, projection, collection=self.collection)
 
     def update(self, updateCriteria, data, updateType='$set'):
         return self.mongoConn.update(updateCriteria, data, collection=self.collection, updateType=updateType)
@@ -162,6 +296,9 @@ class MongoCollection(object):
     def remove(self, data):
         return self.mongoConn.remove(data, collection=self.collection)
 
+    def createIndex(self, keys, **kwargs):
+        return self.mongoConn.createIndex(keys, collection=self.collection, **kwargs)
+
     def drop(self):
         return self.mongoConn.drop(collection=self.collection)
 
@@ -174,6 +311,12 @@ class UserManager(MongoConnection):
 
     coll = None
     config = None
+    # Login only needs these, the rest of the user document is left on the server.
+    loginFields = {'_id': 0, 'password': 1, 'token': 1}
+    existsFields = {'_id': 1}
+    indexed = False
+    indexRetryAt = 0.0
+    indexDelay = indexRetryDelay
 
     def __init__(self):
         self.config = loadYamlDBConfig()
@@ -181,10 +324,38 @@ class UserManager(MongoConnection):
         if self.db is None:
             raise Exception("ERROR: Unable to connect to DB!")
         self.coll = MongoCollection(self, 'usernames')
-        self.r = getRedis()
+        self.ensure_indexes()
+
+    @timed('mongo')
+    def ensure_indexes(self):
+        """
+            Make sure usernames are unique and looked up through an index so login does not slow down as the
+            collection grows. Does nothing if the index is already there. A failure is logged rather than stopping
+            logins. Login tries again once 'indexRetryAt' has passed, which backs off after each failure. Duplicate
+            usernames (error 11000) will not fix themselves so those are not tried again in this process.
+        """
+        try:
+            index = self.coll.createIndex([('username', ASCENDING)], unique=True, name='username_unique')
+            self.indexed = True
+            return index
+        except Exception as e:
+            if getattr(e, 'code', None) == 11000:
+                self.indexRetryAt = float('inf')
+                log.error(f'Unable to make the unique username index as there are duplicate usernames: {e}')
+            else:
+                self.indexRetryAt = time.monotonic() + self.indexDelay
+                log.error(f'Unable to ensure the unique username index, trying again in {self.indexDelay:.0f}s: {e}')
+                self.indexDelay = min(self.indexDelay * 2, maxIndexRetryDelay)
+            return None
+
+    @property
+    def r(self):
+        return getRedis()
 
-    def check_user(self, username):
-        return self.coll.findOne(data={'username': username})
+    @timed('mongo')
+    def check_user(self, username, projection=None):
+        """ The user document of 'username' or None. Pass a 'projection' to only fetch some fields. """
+        return self.coll.findOne(data={'username': username}, projection=projection or self.existsFields)
 
     def create_user(self, username, password):
         if self.check_user(username):
@@ -197,50 +368,69 @@ class UserManager(MongoConnection):
             return self.coll.remove({'username': username})
         return None
 
+    @timed('mongo')
     def applyToken(self, username, token):
         if not (username and token):
             return False
         return self.coll.update({'username': username}, {'token': token})
 
+    def clearToken(self, username, token):
+        """ Forget 'token' as the last one given to 'username' so login does not hand a revoked token back. """
+        if not (username and token):
+            return False
+        return self.coll.update({'username': username, 'token': token}, {'token': ''})
+
     def login(self, username, password):
-        userData = self.check_user(username)
+        if not self.indexed and time.monotonic() >= self.indexRetryAt:
+            self.ensure_indexes()
+        userData = self.check_user(username, projection=self.loginFields)
         if not userData:
             return None
         hashed = userData['password']
         if self.check_password(password, hashed):
+            if passwordPool.needs_rehash(hashed):
+                # The configured cost changed since this hash was made. The password is known right now so upgrade it.
+                try:
+                    self.coll.update({'username': username}, {'password': UserManager.hash_password(password)})
+                except PasswordPoolBusy:
+                    log.debug(f'Skipped upgrading the password hash of {username} as the password pool is full')
+            from FuturePathAPI.libs.Tokens import token_claims, issue_token, tokenExpire as expire
             token = userData.get('token', '')
-            tmpUserName = self.get_from_cache(token)
-            if tmpUserName == username:
+            claims = token_claims(token)
+            # Hand back the last token while it still has most of its life left rather than making a new one.
+            if claims and claims['u'] == username and claims['e'] - time.time() > expire / 2:
                 return token
-            token = Serializer(password).dumps(username).decode('utf-8')
+            token = issue_token(username)
             self.applyToken(username, token)
-            self.r.setex(token, tokenExpire, username)
             return token
         return False
 
+    @timed('redis')
     def get_from_cache(self, key):
         output = self.r.get(key)
         if type(output) is bytes:
             return output.decode('utf-8')
         return output
 
+    @timed('redis')
     def set_too_cache(self, key, value):
         return self.r.setex(key, tokenExpire, value)
 
     @staticmethod
     def checkToken(token):
-        try:
-            return getRedis().get(token)
-        except:
-            return None
+        """ The username 'token' was issued to if it is valid. Checked in process, see libs/Tokens.py. """
+        from FuturePathAPI.libs.Tokens import verify_token
+        return verify_token(token)
 
     @staticmethod
     def hash_password(password):
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """ Runs on passwordPool. Raises PasswordPoolBusy when it is full. """
+        return passwordPool.hash(password)
 
     @staticmethod
     def check_password(password, hashed):
-        return bcrypt.hashpw(password.encode('utf-8'), hashed.encode('utf-8')).decode('utf-8') == hashed
+        """ Runs on passwordPool. Raises PasswordPoolBusy when it is full. """
+        return passwordPool.check(password, hashed)
 
 
 class User(UserMixin):
@@ -251,3 +441,6 @@ class User(UserMixin):
 
     def __repr__(self):
         return '<User %s>' % self.username
+
+
+configure_from(loadYamlDBConfig())
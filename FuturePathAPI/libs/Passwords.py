@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: bcrypt hashing on a small bounded pool of threads so logins can not starve the rest of the API.
+
+
+import os
+import threading
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from FuturePathAPI.libs.Instrumentation import timed
+
+
+class PasswordPoolBusy(Exception):
+    """ Raised instead of queueing when the password pool already has 'maxQueue' hashes waiting. """
+    pass
+
+
+def _rounds(hashed):
+    """ The cost factor of a bcrypt hash IE: 12 for '$2b$12$...'. None if it is not one. """
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordPool(object):
+    """
+        Runs bcrypt on 'maxWorkers' threads of its own. bcrypt releases the GIL while it hashes so this is real
+        parallel work, but it is capped so a burst of logins can only use 'maxWorkers' cores. At most 'maxQueue' more
+        can wait for a thread, past that PasswordPoolBusy is raised straight away so the caller can answer 503.
+        'rounds' is the cost factor new hashes are made with. The threads are made on first use in each process.
+    """
+
+    def __init__(self, maxWorkers=2, maxQueue=8, rounds=12):
+        self.maxWorkers = maxWorkers
+        self.maxQueue = maxQueue
+        self.rounds = rounds
+        self.rejected = 0
+        self._executor = None
+        self._pid = None
+        self._slots = threading.BoundedSemaphore(maxWorkers + maxQueue)
+        self._lock = threading.Lock()
+
+    def configure(self, maxWorkers=None, maxQueue=None, rounds=None):
+        with self._lock:
+            if maxWorkers is not None:
+                self.maxWorkers = int(maxWorkers)
+            if maxQueue is not None:
+                self.maxQueue = int(maxQueue)
+            if rounds is not None:
+                self.rounds = int(rounds)
+            self._slots = threading.BoundedSemaphore(self.maxWorkers + self.maxQueue)
+            self._shutdown()
+
+    def _shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def _get_executor(self):
+        # Threads do not survive a fork so a forked worker needs its own executor.
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix='bcrypt')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def run(self, func, *args):
+        """ func(*args) on the pool. Blocks until it is done unless the pool is full. """
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolBusy('Too many logins are being checked right now. Try again shortly.')
+        try:
+            return self._get_executor().submit(self._timed, func, *args).result()
+        finally:
+            slots.release()
+
+    @staticmethod
+    def _timed(func, *args):
+        with timed('password'):
+            return func(*args)
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self.run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password, hashed):
+        """ Constant time check of 'password' against the bcrypt hash 'hashed'. """
+        try:
+            return self.run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, hashed):
+        return _rounds(hashed) != self.rounds
+
+
+passwordPool = PasswordPool()
+
+
+def configure_from(config):
+    """ Set up passwordPool from the environment or else 'bcryptWorkers', 'bcryptQueue' and 'bcryptRounds' in config. """
+    passwordPool.configure(maxWorkers=os.environ.get('FUTUREPATH_BCRYPT_WORKERS') or config.get('bcryptWorkers'),
+                           maxQueue=os.environ.get('FUTUREPATH_BCRYPT_QUEUE') or config.get('bcryptQueue'),
+                           rounds=os.environ.get('FUTUREPATH_BCRYPT_ROUNDS') or config.get('bcryptRounds'))
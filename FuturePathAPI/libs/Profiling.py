@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Opt-in profiling of single requests with collapsed stack (flamegraph) or cProfile output.
+
+
+import io
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import functools
+from collections import defaultdict
+from flask import request, jsonify
+from flask_login import current_user
+
+
+PROFILE_HEADER = 'X-Profile'
+FILE_HEADER = 'X-Profile-File'
+modes = ('collapsed', 'cprofile')
+# Both can be changed with configure(). A sampleRate of 0.05 profiles 1 in 20 requests into 'directory'.
+sampleRate = float(os.environ.get('FUTUREPATH_PROFILE_RATE', 0) or 0)
+directory = os.environ.get('FUTUREPATH_PROFILE_DIR', '/tmp/d20FuturePathAPI_profiles')
+
+
+def configure(rate=None, outputDir=None):
+    global sampleRate, directory
+    if rate is not None:
+        sampleRate = float(rate)
+    if outputDir is not None:
+        directory = outputDir
+
+
+class StackProfiler(object):
+    """
+        A deterministic profiler that records the time spent in each full call stack of the current thread. The output
+        is the 'collapsed' format used by flamegraph.pl and speedscope: one line per stack of the function names joined
+        by ';' and the microseconds spent in the last function of that stack.
+    """
+
+    def __init__(self):
+        self.stacks = defaultdict(float)
+        self._stack = []
+        self._last = 0.0
+
+    @staticmethod
+    def _name(frame, event, arg):
+        if event.startswith('c_'):
+            module = getattr(arg, '__module__', None)
+            qualname = getattr(arg, '__qualname__', repr(arg))
+            return f'{module}.{qualname}' if module else qualname
+        code = frame.f_code
+        return f'{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}'
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        if self._stack:
+            self.stacks[';'.join(self._stack)] += now - self._last
+        if event in ('call', 'c_call'):
+            self._stack.append(self._name(frame, event, arg))
+        elif self._stack:
+            self._stack.pop()
+        self._last = time.perf_counter()
+
+    def __enter__(self):
+        self._last = time.perf_counter()
+        sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *args):
+        sys.setprofile(None)
+        return False
+
+    def output(self):
+        micros = ((stack, round(seconds * 1000000)) for stack, seconds in sorted(self.stacks.items()))
+        return ''.join(f'{stack} {value}\n' for stack, value in micros if value)
+
+
+class CProfiler(object):
+    """ cProfile with its results as pstats text sorted by cumulative time. """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.profile.disable()
+        return False
+
+    def output(self):
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats('cumulative').print_stats(60)
+        return stream.getvalue()
+
+
+def _write(name, mode, output):
+    os.makedirs(directory, exist_ok=True)
+    fileName = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{random.getrandbits(32):08x}-{name}" \
+               f".{'collapsed' if mode == 'collapsed' else 'txt'}"
+    with open(os.path.join(directory, fileName), 'w') as f:
+        f.write(output)
+    return fileName
+
+
+def profiled(func):
+    """
+        Decorator for a Flask view. A request is profiled when either:
+            * It sends the 'X-Profile' header along with a valid 'Token'. The header is the mode ('collapsed' or
+              'cprofile') optionally followed by ',file' to write the result to 'directory' instead of returning it.
+              Returned results wrap the normal JSON as {"Response": ..., "Profile": ..., "Format": ...}.
+            * It is picked at random by 'sampleRate'. These are always written to 'directory' as collapsed stacks.
+        Without either the view is called directly after one header lookup. Streamed responses are only profiled up to
+        the point the stream is returned and can not be returned inline, those get a 400.
+    """
+
+    @functools.wraps(func)
+    def func_wrapper(*args, **kwargs):
+        header = request.headers.get(PROFILE_HEADER)
+        if header is None:
+            if not sampleRate or random.random() >= sampleRate:
+                return func(*args, **kwargs)
+            mode, toFile = 'collapsed', True
+        else:
+            if not current_user.is_authenticated:
+                return jsonify({'Profile': 'A valid Token is required to profile a request'}), 401
+            mode, _, destination = header.strip().lower().partition(',')
+            mode = mode or 'collapsed'
+            if mode not in modes:
+                return jsonify({'Profile': f"The {PROFILE_HEADER} header has to be one of {', '.join(modes)}"}), 400
+            toFile = destination.strip() == 'file'
+
+        profiler = StackProfiler() if mode == 'collapsed' else CProfiler()
+        with profiler:
+            response = func(*args, **kwargs)
+        output = profiler.output()
+
+        if toFile:
+            fileName = _write(func.__name__, mode, output)
+            if header is not None and hasattr(response, 'headers'):
+                response.headers[FILE_HEADER] = fileName
+            return response
+        if getattr(response, 'is_streamed', False):
+            # Nothing will read the stream so close it now to run its clean up (IE: releasing its cost reservation).
+            response.close()
+            return jsonify({'Profile': "Streamed responses can only be profiled with ',file'"}), 400
+        if hasattr(response, 'get_json'):
+            return jsonify({'Response': response.get_json(), 'Profile': output, 'Format': mode})
+        return jsonify({'Profile': output, 'Format': mode})
+
+    return func_wrapper
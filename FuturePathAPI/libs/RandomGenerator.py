@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Per thread numpy random Generators spawned from one SeedSequence.
+
+
+import threading
+from contextlib import contextmanager
+from numpy.random import Generator, PCG64, SeedSequence
+
+
+_seedSequence = SeedSequence()
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def get_generator():
+    """
+        The random Generator of the current thread. Each thread gets its own PCG64 stream spawned from the process
+        SeedSequence the first time it asks, so threads never share a generator or wait on each other's lock.
+    :return: numpy.random.Generator
+    """
+    try:
+        return _local.generator
+    except AttributeError:
+        with _lock:
+            child = _seedSequence.spawn(1)[0]
+        _local.generator = generator = Generator(PCG64(child))
+        return generator
+
+
+def reseed(entropy=None):
+    """
+        Start over from a new SeedSequence and drop every thread's generator. Call this in a child process after a
+        fork otherwise every child would roll exactly the same numbers as its parent.
+    :param entropy: None (new entropy from the OS) or a non-negative int
+    """
+    global _seedSequence, _local
+    with _lock:
+        _seedSequence = SeedSequence(entropy)
+        _local = threading.local()
+
+
+@contextmanager
+def seeded(seed):
+    """
+        Use a Generator seeded with 'seed' on the current thread for the duration of the with block. The same seed and
+        the same rolls give the same results which is helpful for testing.
+    :param seed: None (does nothing) or a non-negative int
+    """
+    if seed is None:
+        yield get_generator()
+        return
+    previous = getattr(_local, 'generator', None)
+    _local.generator = generator = Generator(PCG64(seed))
+    try:
+        yield generator
+    finally:
+        if previous is None:
+            del _local.generator
+        else:
+            _local.generator = previous
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Per client token bucket rate limiting shared through Redis with an in-process fallback.
+
+
+import os
+import math
+import time
+import logging
+import functools
+import threading
+from flask import request, jsonify, make_response
+from flask_login import current_user
+from FuturePathAPI.libs.LRUCache import LRUCache
+from FuturePathAPI.libs.Instrumentation import timed
+
+
+log = logging.getLogger('RateLimit')
+KEY_PREFIX = 'ratelimit:'
+# How long to stop asking Redis after it fails so a down server does not add a timeout to every request.
+redisRetryDelay = 5.0
+
+# KEYS[1] the bucket. ARGV: tokens added per second, bucket size, tokens this request takes.
+# Returns {allowed (1/0), tokens left, milliseconds until 'cost' tokens are available, milliseconds until full}.
+# The time comes from the Redis server so every worker and host agrees on it.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+local full = math.ceil((burst - tokens) * 1000 / rate)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], full + 1000)
+return {allowed, math.floor(tokens), wait, full}
+"""
+
+
+class Decision(object):
+    """ The answer for one request. Times are in seconds. """
+
+    __slots__ = ('allowed', 'limit', 'remaining', 'retryAfter', 'reset')
+
+    def __init__(self, allowed, limit, remaining, retryAfter, reset):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retryAfter = retryAfter
+        self.reset = reset
+
+    def headers(self):
+        headers = {'RateLimit-Limit': str(self.limit), 'RateLimit-Remaining': str(max(int(self.remaining), 0)),
+                   'RateLimit-Reset': str(math.ceil(self.reset))}
+        if not self.allowed:
+            headers['Retry-After'] = str(max(math.ceil(self.retryAfter), 1))
+        return headers
+
+
+class LocalBuckets(object):
+    """
+        Token buckets kept in this process. Used when Redis can not be reached so each worker enforces the limit on
+        its own. The least recently seen clients are dropped once 'maxClients' is reached.
+    """
+
+    def __init__(self, maxClients=10000, clock=time.monotonic):
+        self.buckets = LRUCache(maxSize=maxClients)
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        now = self.clock()
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens = min(burst, bucket[0] + max(0.0, now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets.set(key, (tokens, now))
+        wait = 0.0 if allowed else (cost - tokens) / rate
+        return Decision(allowed, burst, math.floor(tokens), wait, (burst - tokens) / rate)
+
+    def clear(self):
+        self.buckets.clear()
+
+
+class RedisBuckets(object):
+    """
+        Token buckets in Redis shared by every worker. Each request is one EVALSHA of TOKEN_BUCKET_LUA. 'getRedis' is
+        any callable that returns a redis client (or a stand in with register_script).
+    """
+
+    def __init__(self, getRedis):
+        self.getRedis = getRedis
+        self._scripts = {}
+
+    def _script(self):
+        server = self.getRedis()
+        script = self._scripts.get(id(server))
+        if script is None:
+            script = server.register_script(TOKEN_BUCKET_LUA)
+            self._scripts = {id(server): script}
+        return script
+
+    def take(self, key, rate, burst, cost=1):
+        with timed('redis'):
+            allowed, remaining, wait, full = self._script()(keys=[KEY_PREFIX + key], args=[rate, burst, cost])
+        return Decision(bool(allowed), burst, int(remaining), int(wait) / 1000.0, int(full) / 1000.0)
+
+
+def _default_redis():
+    from FuturePathAPI.libs.MongoDataBase import getRedis
+    return getRedis()
+
+
+class RateLimiter(object):
+    """
+        Limits each client to 'rate' requests a second with bursts of up to 'burst'. Clients with a valid Token are
+        limited by their username, everyone else by their IP address. Buckets live in Redis when it is up and fall back
+        to LocalBuckets when it is not. A 'rate' of 0 turns limiting off.
+    """
+
+    def __init__(self, rate=20.0, burst=40, getRedis=_default_redis, useRedis=True):
+        self.rate = rate
+        self.burst = burst
+        self.useRedis = useRedis
+        self.remote = RedisBuckets(getRedis)
+        self.local = LocalBuckets()
+        self.limited = 0
+        self._redisDownUntil = 0.0
+
+    def configure(self, rate=None, burst=None, useRedis=None, getRedis=None):
+        if rate is not None:
+            self.rate = float(rate)
+        if burst is not None:
+            self.burst = int(burst)
+        if useRedis is not None:
+            self.useRedis = useRedis
+        if getRedis is not None:
+            self.remote = RedisBuckets(getRedis)
+        self._redisDownUntil = 0.0
+
+    @property
+    def enabled(self):
+        return self.rate > 0 and self.burst > 0
+
+    def take(self, key, cost=1):
+        if self.useRedis and time.monotonic() >= self._redisDownUntil:
+            try:
+                decision = self.remote.take(key, self.rate, self.burst, cost)
+            except Exception as e:
+                log.warning(f'Rate limiting in process only for {redisRetryDelay}s as Redis failed: {e}')
+                self._redisDownUntil = time.monotonic() + redisRetryDelay
+                decision = self.local.take(key, self.rate, self.burst, cost)
+        else:
+            decision = self.local.take(key, self.rate, self.burst, cost)
+        if not decision.allowed:
+            self.limited += 1
+        return decision
+
+    def reset(self):
+        """ Forget the local buckets and any Redis failure. Called in each gunicorn worker after it is forked. """
+        self.local.clear()
+        self.remote = RedisBuckets(self.remote.getRedis)
+        self._redisDownUntil = 0.0
+
+
+def client_key():
+    """ 'user:<username>' when the request has a valid Token (resolved by load_user) otherwise 'ip:<address>'. """
+    if current_user.is_authenticated:
+        return f'user:{current_user.username}'
+    return f'ip:{request.remote_addr}'
+
+
+def rate_limited(func=None, cost=1):
+    """
+        Decorator for a Flask view that takes 'cost' tokens from the client's bucket. 'cost' can also be a function
+        called with no arguments during the request that returns it. A cost is never more than the burst so a large
+        request empties the bucket rather than never being allowed. Over the limit the view is not called and a 429 is
+        returned. Every answer gets the RateLimit-Limit, RateLimit-Remaining and RateLimit-Reset headers and a 429 also
+        gets Retry-After.
+    """
+    if func is None:
+        return functools.partial(rate_limited, cost=cost)
+
+    @functools.wraps(func)
+    def func_wrapper(*args, **kwargs):
+        if not rateLimiter.enabled:
+            return func(*args, **kwargs)
+        decision = rateLimiter.take(client_key(), min(cost() if callable(cost) else cost, rateLimiter.burst))
+        if not decision.allowed:
+            response = jsonify({'RateLimit': f'Too many requests. Try again in {decision.headers()["Retry-After"]}s'})
+            response.status_code = 429
+        else:
+            response = make_response(func(*args, **kwargs))
+        response.headers.extend(decision.headers())
+        return response
+
+    return func_wrapper
+
+
+rateLimiter = RateLimiter()
+rateLimiter.configure(rate=os.environ.get('FUTUREPATH_RATE_LIMIT'), burst=os.environ.get('FUTUREPATH_RATE_BURST'))
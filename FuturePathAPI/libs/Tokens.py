@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: API tokens signed with a server key that are checked in process, and the Redis list of revoked ones.
+
+
+import os
+import time
+import secrets
+import logging
+import threading
+from itsdangerous import URLSafeSerializer, BadSignature
+from FuturePathAPI.libs.MongoDataBase import loadYamlDBConfig, loadYamlREDISConfig, getRedis, redisPipeline
+from FuturePathAPI.libs.Instrumentation import timed
+
+
+log = logging.getLogger('Tokens')
+REVOKED_KEY = 'revokedTokens'
+TOKEN_SALT = 'futurepath-token'
+
+
+def _load_key():
+    """
+        The key tokens are signed with. From FUTUREPATH_TOKEN_KEY or 'tokenKey' in db.yaml. Every worker and host must
+        use the same key so without one a random key is made. With gunicorn's preload_app the workers share it but
+        every token stops working when the server restarts.
+    """
+    key = os.environ.get('FUTUREPATH_TOKEN_KEY') or loadYamlDBConfig().get('tokenKey')
+    if not key:
+        log.warning("No FUTUREPATH_TOKEN_KEY or 'tokenKey' in db.yaml. Tokens will not survive a restart.")
+        key = secrets.token_hex(32)
+    return key
+
+
+tokenExpire = int(os.environ.get('FUTUREPATH_TOKEN_EXPIRE') or loadYamlREDISConfig().get('expire', 43200))
+serializer = URLSafeSerializer(_load_key(), salt=TOKEN_SALT)
+
+
+class RevocationList(object):
+    """
+        The ids of revoked tokens that have not expired yet. They are kept in a Redis sorted set scored by when the
+        token expires so every worker can see them. Each process keeps a copy that is checked without any I/O. Until
+        the copy has been loaded once a check waits for that load, so a new or forked worker never accepts a revoked
+        token. After that the first check once it is 'refreshInterval' seconds old starts one background thread to
+        reload it and carries on with the copy it has, so a slow Redis never holds up a request. If Redis can not be
+        reached the last copy is kept, and before the first load works a check tries again once per interval.
+    """
+
+    def __init__(self, refreshInterval=5.0, getRedis=getRedis):
+        self.refreshInterval = refreshInterval
+        self.getRedis = getRedis
+        self.revoked = frozenset()
+        self.loaded = False
+        self._nextRefresh = 0.0
+        self._lock = threading.Lock()
+
+    def __contains__(self, tokenId):
+        if time.monotonic() >= self._nextRefresh:
+            if self.loaded:
+                self.refresh_in_background()
+            else:
+                self._first_load()
+        return tokenId in self.revoked
+
+    def _first_load(self):
+        """ Load from Redis and wait for it. Threads that queue up behind a load do not start another one. """
+        lock = self._lock
+        lock.acquire()
+        if self.loaded or time.monotonic() < self._nextRefresh:
+            lock.release()
+            return
+        self._nextRefresh = time.monotonic() + self.refreshInterval
+        self._refresh(lock)
+
+    def refresh_in_background(self):
+        """ Start reloading from Redis on a thread unless a reload is already running. Returns straight away. """
+        lock = self._lock
+        if not lock.acquire(blocking=False):
+            return
+        self._nextRefresh = time.monotonic() + self.refreshInterval
+        try:
+            threading.Thread(target=self._refresh, args=(lock,), name='revocation-refresh', daemon=True).start()
+        except Exception:
+            lock.release()
+            raise
+
+    def refresh(self):
+        """ Reload from Redis now, waiting for a reload that is already running. """
+        lock = self._lock
+        lock.acquire()
+        self._nextRefresh = time.monotonic() + self.refreshInterval
+        self._refresh(lock)
+
+    def _refresh(self, lock):
+        try:
+            with timed('redis'):
+                members = self.getRedis().zrangebyscore(REVOKED_KEY, time.time(), '+inf')
+            self.revoked = frozenset(m.decode('utf-8') if type(m) is bytes else m for m in members)
+            self.loaded = True
+        except Exception as e:
+            log.warning(f'Unable to refresh the revoked tokens, keeping the last {len(self.revoked)}: {e}')
+        finally:
+            lock.release()
+
+    def revoke(self, tokenId, expires):
+        """ Revoke 'tokenId' until 'expires' (epoch seconds). Revoked ids that have expired are cleared out too. """
+        with redisPipeline(self.getRedis()) as pipe:
+            pipe.zadd(REVOKED_KEY, {tokenId: expires})
+            pipe.zremrangebyscore(REVOKED_KEY, '-inf', time.time())
+        with self._lock:
+            self.revoked = self.revoked | {tokenId}
+
+    def reset(self):
+        """ Start over after a fork. A reload thread does not survive the fork so its lock is replaced too. """
+        self._lock = threading.Lock()
+        self.revoked = frozenset()
+        self.loaded = False
+        self._nextRefresh = 0.0
+
+
+revocationList = RevocationList(refreshInterval=float(os.environ.get('FUTUREPATH_REVOCATION_REFRESH') or 5.0))
+
+
+def issue_token(username, expire=None):
+    """ A new token for 'username' that is good for 'expire' seconds (default tokenExpire). """
+    claims = {'u': username, 'j': secrets.token_urlsafe(12), 'e': int(time.time()) + (expire or tokenExpire)}
+    return serializer.dumps(claims)
+
+
+def token_claims(token):
+    """
+        The claims of 'token' if it was signed by this server, has not expired and has not been revoked.
+    :return: dict {'u': username, 'j': token id, 'e': expires} or None
+    """
+    if not token:
+        return None
+    try:
+        claims = serializer.loads(token)
+    except BadSignature:
+        return None
+    if type(claims) is not dict or claims.get('e', 0) <= time.time() or claims.get('j') in revocationList:
+        return None
+    return claims
+
+
+def verify_token(token):
+    """ The username of a valid 'token' otherwise None. Only Redis is touched and only to refresh revocationList. """
+    claims = token_claims(token)
+    return claims['u'] if claims else None
+
+
+def revoke_token(token):
+    """ Revoke a valid 'token'. Returns False if it was not valid to begin with. """
+    claims = token_claims(token)
+    if claims is None:
+        return False
+    revocationList.revoke(claims['j'], claims['e'])
+    return True
@@ -7,7 +7,63 @@
 # Description:
 
 
-from typing import Dict, Optional
+import json
+from typing import Any, Dict, Optional, Union
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """ Parse JSON with orjson when it is installed otherwise the standard json module. """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """ Compact JSON with orjson when it is installed otherwise the standard json module. """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """ A Flask JSON provider (app.json) that uses orjson for requests and responses when it is installed. Without
+        orjson, or when a caller passes json module arguments, it behaves exactly like Flask's default provider.
+        Responses are encoded straight to bytes instead of going through a str first. Keys are left in the order they
+        were added (IE: totals in numeric order and batch results in request order) rather than sorted.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super(FastJSONProvider, self).dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super(FastJSONProvider, self).loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if orjson is None:
+            return super(FastJSONProvider, self).response(*args, **kwargs)
+        options = self._options() | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        body = orjson.dumps(self._prepare_response_obj(args, kwargs), default=self.default, option=options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
 
 
 def jsonHook(jsonInput: Optional[Dict]) -> Dict:
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description:
+
+
+from flask import jsonify, Response, Blueprint
+from FuturePathAPI.libs import Instrumentation
+
+
+blueprint = Blueprint('metrics', __name__)
+
+
+@blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    :OPTIONS: GET
+    :PATH: /metrics
+    :DESC: Prometheus metrics in the text exposition format. futurepath_phase_seconds times the parse, distribution,
+        sample, serialize, redis and mongo phases of a request. futurepath_request_seconds times whole requests by
+        endpoint. The futurepath_cache_* metrics show the hits, misses, evictions and size of the caches. When run under
+        gunicorn the values are the totals of every worker.
+    :Content-Type: text/plain
+    """
+    if not Instrumentation.enabled():
+        return jsonify({'Metrics': 'prometheus_client is not installed'}), 501
+    output, contentType = Instrumentation.export()
+    return Response(output, content_type=contentType)
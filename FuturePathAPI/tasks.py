@@ -7,8 +7,11 @@
 # Description:
 
 
-from flask import jsonify
-from FuturePathAPI.initApp import app, not_found, END_POINT
+from flask import jsonify, Blueprint
+from FuturePathAPI.initApp import not_found, END_POINT
+
+
+blueprint = Blueprint('tasks', __name__)
 
 
 """
@@ -37,11 +40,18 @@ tasks = [
         'description': u'Produces a random number between 1 and the rolling number. Optional is to add the number'
                        u'of dice rolls. You can also pass dice via JSON with the "/tasks/roll" endpoint',
         'uri': f"{END_POINT}/tasks/roll"
+    },
+    {
+        'id': 2,
+        'name': u'probability',
+        'description': u'Returns the exact odds of every total a dice string can roll along with the mean, variance and '
+                       u'percentiles. Accepts the same die options as rolling.',
+        'uri': f"{END_POINT}/tasks/probability"
     }
 ]
 
 
-@app.route('/tasks', methods=['GET'])
+@blueprint.route('/tasks', methods=['GET'])
 def get_tasks():
     """
     :OPTIONS: GET
@@ -52,7 +62,7 @@ def get_tasks():
     return jsonify({'tasks': tasks})
 
 
-@app.route('/tasks/<int:taskid>', methods=['GET'])
+@blueprint.route('/tasks/<int:taskid>', methods=['GET'])
 def get_tasks_id(taskid):
     """
     :OPTIONS: GET
@@ -67,7 +77,7 @@ def get_tasks_id(taskid):
     return not_found(404)
 
 
-@app.route('/tasks/<name>', methods=['GET'])
+@blueprint.route('/tasks/<name>', methods=['GET'])
 def get_tasks_name(name):
     """
     :OPTIONS: GET
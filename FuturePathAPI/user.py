@@ -7,11 +7,14 @@
 # Description:
 
 
-from flask import jsonify
-from FuturePathAPI.initApp import app, END_POINT
+from flask import jsonify, Blueprint
+from FuturePathAPI.initApp import END_POINT
 from flask_login import login_required
 
 
+blueprint = Blueprint('user', __name__)
+
+
 utasks = [
     {
         'id': 1,
@@ -22,7 +25,7 @@ utasks = [
 ]
 
 
-@app.route('/u', methods=['GET'])
+@blueprint.route('/u', methods=['GET'])
 def user_tasks():
     """
     :OPTIONS: GET
@@ -33,7 +36,7 @@ def user_tasks():
     return jsonify({'Username Tasks': utasks})
 
 
-@app.route('/u/<username>/info', methods=['GET'])
+@blueprint.route('/u/<username>/info', methods=['GET'])
 @login_required
 def user_info():
     """
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Precompute the distribution table that gunicorn workers memory-map at startup.
+
+
+import sys
+import time
+import argparse
+from FuturePathAPI import MAINDIR
+from FuturePathAPI.libs.Distribution import Distribution
+from FuturePathAPI.libs.DistributionTable import tableKey, write_table
+from FuturePathAPI.Rolling import DiePicker, DISTRIBUTION_TABLE
+
+
+# 'Common' here is anything a character sheet is likely to ask for.
+maxCount = 20
+rerollDieOptions = (None, 1)
+adjustments = (0, 1, 2)
+
+
+def all_dice():
+    """ Every set of faces that DiePicker can produce with the rerollDie/subAll/addAll variants above. """
+    dice = set()
+    for die in DiePicker.diceDict:
+        for rerollDie in rerollDieOptions:
+            for subAll in adjustments:
+                for addAll in adjustments:
+                    faces = DiePicker.get_die(die, rerollDie=rerollDie, subAll=subAll, addAll=addAll)
+                    if faces:
+                        dice.add(faces)
+    return sorted(dice)
+
+
+def build_distributions(maxCount=maxCount):
+    """ The distributions of rolling every die from all_dice 1 to 'maxCount' times, keyed by tableKey. """
+    distributions = {}
+    for die in all_dice():
+        single = Distribution.from_faces(die)
+        total = Distribution()
+        for count in range(1, maxCount + 1):
+            total = total.add(single)
+            distributions[tableKey(die, count)] = total
+    return distributions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute the distribution table shared by the API workers.')
+    parser.add_argument('--output', default=MAINDIR + DISTRIBUTION_TABLE,
+                        help='Directory to write the table into. (default: %(default)s)')
+    parser.add_argument('--max-count', type=int, default=maxCount,
+                        help='Largest number of dice to precompute for each die. (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    written = write_table(args.output, build_distributions(args.max_count))
+    print(f'Wrote {written} distributions to {args.output} in {time.perf_counter() - start:.2f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
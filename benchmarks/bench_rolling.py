@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Micro benchmarks of the rolling engine with a baseline comparison to catch regressions.
+
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import numpy
+from FuturePathAPI.Rolling import DieAnalyzer, DiePicker, Roller, DieRoller, Rolling, RollProbabilityGenerator
+
+
+dieSizes = (4, 6, 20, 100)
+dieCounts = (1, 4, 20)
+metrics = ('min', 'mean', 'p50', 'p95', 'p99', 'max')
+
+
+def _json_roll(dString, dieOptions=None, diceOptions=None):
+    # die_json_analyzer pops keys out of 'diceOptions' so every call is given a fresh string to parse.
+    roll = {'dice': [{'id': 1, 'dString': dString, 'dieOptions': dieOptions or {}}],
+            'diceOptions': diceOptions or {}}
+    return json.dumps(roll)
+
+
+def cases():
+    """
+        Every benchmark as (name, function). Names are stable so results can be compared between runs. Each die size
+        and count is run plain and with the drop/keep and rerollTotal options.
+    :return: list of tuples
+    """
+    benchmarks = []
+
+    def add(name, func, *args, **kwargs):
+        benchmarks.append((name, lambda: func(*args, **kwargs)))
+
+    for size in dieSizes:
+        faces = DiePicker.get_die(size)
+        for count in dieCounts:
+            dString = f'{count}d{size}'
+            rerollTotal = count * (size + 1) // 2
+            add(f'die_str_analyzer[{dString}]', DieAnalyzer.die_str_analyzer, f'{dString}+2')
+            add(f'die_json_analyzer[{dString}]', DieAnalyzer.die_json_analyzer, _json_roll(dString))
+            add(f'RollProbabilityGenerator[{dString}]', RollProbabilityGenerator, faces, repeat=count)
+            add(f'_roller[{dString}]', Roller._roller, faces, count)
+            add(f'_reroll_total[{dString}>{rerollTotal}]', Roller._reroll_total, faces, count, rerollTotal)
+            dice, connectors, diceOptions = DieAnalyzer.die_str_analyzer(dString)
+            add(f'roll_dice[{dString}]', DieRoller.roll_dice, dice, connectors, diceOptions)
+            if count > 1:
+                add(f'_drop_lowest[{dString}]', Roller._drop_lowest, faces, count, 1)
+                add(f'_reroll_total[{dString}>{rerollTotal},dropLowest]', Roller._reroll_total, faces, count,
+                    rerollTotal, dropLowest=1)
+                for option in ('dropHighest', 'keepHighest', 'keepLowest'):
+                    dice, connectors, diceOptions = DieAnalyzer.die_str_analyzer(dString, {option: 1})
+                    add(f'roll_dice[{dString},{option}]', DieRoller.roll_dice, dice, connectors, diceOptions)
+
+    dice, connectors, diceOptions = DieAnalyzer.die_str_analyzer('1d20+1d4+2')
+    add('roll_dice[1d20+1d4+2]', DieRoller.roll_dice, dice, connectors, diceOptions)
+    dice, connectors, diceOptions = DieAnalyzer.die_json_analyzer(_json_roll('4d6', {'dropLowest': 1},
+                                                                             {'repeatRoll': 6}))
+    add('roll_dice[4d6,dropLowest,repeatRoll=6]', DieRoller.roll_dice, dice, connectors, diceOptions)
+    add('die_json_analyzer[4d6,dropLowest,repeatRoll=6]', DieAnalyzer.die_json_analyzer,
+        _json_roll('4d6', {'dropLowest': 1, 'rerollTotal': 8}, {'repeatRoll': 6}))
+    add('LowFantasyCharacterStats', Rolling.LowFantasyCharacterStats)
+    add('NormalCharacterStats', Rolling.NormalCharacterStats)
+    add('HighFantasyCharacterStats', Rolling.HighFantasyCharacterStats)
+    return benchmarks
+
+
+def measure(func, samples, warmup):
+    """
+        Time 'samples' calls of 'func' one at a time so the tail (p99) is real rather than an average of batches.
+    :return: dict of metric -> microseconds
+    """
+    for _ in range(warmup):
+        func()
+    timings = numpy.empty(samples, dtype=numpy.float64)
+    clock = time.perf_counter_ns
+    for index in range(samples):
+        start = clock()
+        func()
+        timings[index] = clock() - start
+    timings /= 1000.0
+    return {'min': float(timings.min()),
+            'mean': float(timings.mean()),
+            'p50': float(numpy.percentile(timings, 50)),
+            'p95': float(numpy.percentile(timings, 95)),
+            'p99': float(numpy.percentile(timings, 99)),
+            'max': float(timings.max()),
+            'samples': samples}
+
+
+def run(samples=2000, warmup=200, pattern=None):
+    results = {}
+    for name, func in cases():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(func, samples, warmup)
+        print(f"{name:<55} p50 {results[name]['p50']:>10.2f}us  p99 {results[name]['p99']:>10.2f}us", file=sys.stderr)
+    return {'meta': {'python': platform.python_version(),
+                     'numpy': numpy.__version__,
+                     'platform': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                     'samples': samples,
+                     'unit': 'us'},
+            'results': results}
+
+
+def compare(current, baseline, metric='p99', threshold=0.25):
+    """
+        Compare two runs. A case regresses when its 'metric' is more than 'threshold' (0.25 == 25%) slower than the
+        baseline. Cases only in one of the runs are listed but never fail the comparison.
+    :return: dict with 'regressions', 'improvements', 'added' and 'removed'
+    """
+    report = {'metric': metric, 'threshold': threshold, 'regressions': {}, 'improvements': {}, 'added': [],
+              'removed': []}
+    currentResults, baselineResults = current['results'], baseline['results']
+    for name, stats in currentResults.items():
+        if name not in baselineResults:
+            report['added'].append(name)
+            continue
+        before, after = baselineResults[name][metric], stats[metric]
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            report['regressions'][name] = {'baseline': before, 'current': after, 'change': change}
+        elif change < -threshold:
+            report['improvements'][name] = {'baseline': before, 'current': after, 'change': change}
+    report['removed'] = [name for name in baselineResults if name not in currentResults]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the rolling engine.')
+    parser.add_argument('--output', help='Write the results as JSON to this file. (default: stdout)')
+    parser.add_argument('--baseline', help='Compare against the JSON results of an earlier run.')
+    parser.add_argument('--metric', default='p99', choices=metrics,
+                        help='Metric compared against the baseline. (default: %(default)s)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Fail when a case is this much slower than the baseline. (default: %(default)s)')
+    parser.add_argument('--samples', type=int, default=2000, help='Timed calls per case. (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=200, help='Untimed calls per case. (default: %(default)s)')
+    parser.add_argument('--filter', dest='pattern', help='Only run cases whose name contains this string.')
+    args = parser.parse_args(argv)
+
+    current = run(samples=args.samples, warmup=args.warmup, pattern=args.pattern)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+    else:
+        json.dump(current, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    report = compare(current, baseline, metric=args.metric, threshold=args.threshold)
+    for name, change in sorted(report['regressions'].items()):
+        print(f"REGRESSION {name}: {change['baseline']:.2f}us -> {change['current']:.2f}us "
+              f"({change['change']:+.0%})", file=sys.stderr)
+    for name, change in sorted(report['improvements'].items()):
+        print(f"improved   {name}: {change['baseline']:.2f}us -> {change['current']:.2f}us "
+              f"({change['change']:+.0%})", file=sys.stderr)
+    return 1 if report['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
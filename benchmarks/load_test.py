@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Load test the API routes in-process or against a running gunicorn and report latency percentiles.
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import numpy
+
+
+# route name -> weight. Roughly what a character sheet front end sends.
+trafficMix = {'roll_get': 50, 'roll_post': 25, 'character': 15, 'protected': 10}
+getDice = ('d20', '1d20+5', '2d6+3', '4d6?dropLowest=1', '2d20?keepHighest=1', '8d6', '1d20+1d4+2', 'd100')
+postDice = ({'dString': '1d8', 'modifier': '+3'},
+            {'dString': '2d20', 'dieOptions': {'keepLowest': 1}},
+            {'dice': [{'id': 1, 'dString': 'd20', 'connectorString': '+'}, {'id': 2, 'dString': 'd4', 'modifier': '+2'}]},
+            {'dice': [{'id': 1, 'dString': '4d6', 'dieOptions': {'dropLowest': 1, 'rerollTotal': 8}}],
+             'diceOptions': {'repeatRoll': 6}})
+levels = ('low', 'normal', 'high')
+percentiles = (50, 95, 99, 99.9)
+loadTestUser = 'loadtest'
+
+
+class InMemoryRedis(object):
+    """
+        Just enough of redis.StrictRedis for token revocation, including '/logout'. Values are returned as bytes like
+        the real client. There is no register_script so the rate limiter's Lua token bucket can not run against it,
+        which is why main() keeps rate limiting in process with useRedis=False.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value, *args, **kwargs):
+        with self._lock:
+            self._data[key] = value if isinstance(value, bytes) else str(value).encode('utf-8')
+        return True
+
+    def setex(self, key, expire, value):
+        return self.set(key, value)
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            self._data.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        with self._lock:
+            return [m.encode('utf-8') for m, score in self._data.get(key, {}).items() if low <= score <= high]
+
+    def zremrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        with self._lock:
+            members = self._data.get(key, {})
+            removed = [m for m, score in members.items() if low <= score <= high]
+            for m in removed:
+                del members[m]
+        return len(removed)
+
+    def ping(self):
+        return True
+
+    def pipeline(self, transaction=False):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline(object):
+    """ Stands in for a redis pipeline of InMemoryRedis. Commands run as soon as they are queued. """
+
+    def __init__(self, server):
+        self.server = server
+        self.results = []
+
+    def __getattr__(self, name):
+        command = getattr(self.server, name)
+
+        def _run(*args, **kwargs):
+            self.results.append(command(*args, **kwargs))
+            return self
+        return _run
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.reset()
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+    def reset(self):
+        self.results = []
+
+
+def use_in_memory_auth(username=loadTestUser):
+    """
+        Point the app's token revocation list at an InMemoryRedis and sign a token for 'username' so
+        '/login/protected' and '/logout' can be load tested without Mongo or Redis running. Only '/login' needs Mongo,
+        '/logout' tries to clear the stored token there and carries on when it can not.
+    :return: str the token
+    """
+    from FuturePathAPI.libs import MongoDataBase
+    from FuturePathAPI.libs.Tokens import issue_token
+    MongoDataBase.redisServer = InMemoryRedis()
+    MongoDataBase.redisPid = os.getpid()
+    return issue_token(username)
+
+
+def request_for(route, rng):
+    """ A random request for 'route' as (method, path, json body or None). """
+    if route == 'roll_get':
+        return 'GET', f'/tasks/roll/{getDice[rng.integers(len(getDice))]}', None
+    if route == 'roll_post':
+        return 'POST', '/tasks/roll', postDice[rng.integers(len(postDice))]
+    if route == 'character':
+        return 'GET', f'/tasks/roll/character/{levels[rng.integers(len(levels))]}', None
+    return 'GET', '/login/protected', None
+
+
+class InProcessClient(object):
+    """ Sends requests straight into the WSGI app with Flask's test client. """
+
+    def __init__(self, app, token):
+        self.client = app.test_client()
+        self.headers = {'Token': token} if token else {}
+
+    def send(self, method, path, body):
+        response = self.client.open(path, method=method, json=body, headers=self.headers)
+        response.get_data()
+        return response.status_code
+
+
+class HTTPClient(object):
+    """ Sends requests to a running server over one keep-alive connection. """
+
+    def __init__(self, url, token):
+        parts = urlsplit(url)
+        self.prefix = parts.path.rstrip('/')
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        self.headers = {'Token': token} if token else {}
+
+    def send(self, method, path, body):
+        headers = dict(self.headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            return 599
+
+
+def worker(client, routes, weights, seed, deadline, remaining, results, lock):
+    rng = numpy.random.default_rng(seed)
+    clock = time.perf_counter
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    while True:
+        if deadline is not None and clock() >= deadline:
+            break
+        if remaining is not None:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+        route = routes[rng.choice(len(routes), p=weights)]
+        method, path, body = request_for(route, rng)
+        start = clock()
+        status = client.send(method, path, body)
+        latencies[route].append(clock() - start)
+        if status >= 400:
+            errors[route] += 1
+    with lock:
+        for route in routes:
+            results[route][0].extend(latencies[route])
+            results[route][1] += errors[route]
+
+
+def summarize(latencies, errors, elapsed):
+    timings = numpy.asarray(latencies, dtype=numpy.float64) * 1000.0
+    summary = {'requests': int(timings.size), 'errors': errors, 'throughput': timings.size / elapsed if elapsed else 0.0}
+    for percent in percentiles:
+        summary[f'p{percent:g}'] = float(numpy.percentile(timings, percent)) if timings.size else None
+    return summary
+
+
+def run(client_factory, routes, weights, concurrency, requests=None, duration=None, seed=None):
+    """
+        Send requests from 'concurrency' threads until 'requests' have been sent or 'duration' seconds pass.
+    :return: dict route -> summary (plus 'all'). Latency is in milliseconds and throughput in requests per second.
+    """
+    lock = threading.Lock()
+    results = {route: [[], 0] for route in routes}
+    remaining = [requests] if requests is not None else None
+    seeds = numpy.random.SeedSequence(seed).spawn(concurrency)
+    clients = [client_factory() for _ in range(concurrency)]
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+    threads = [threading.Thread(target=worker, args=(clients[index], routes, weights, seeds[index], deadline,
+                                                     remaining, results, lock))
+               for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    report = {route: summarize(latencies, errors, elapsed) for route, (latencies, errors) in results.items()}
+    report['all'] = summarize([latency for latencies, _ in results.values() for latency in latencies],
+                              sum(errors for _, errors in results.values()), elapsed)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the API with a realistic mix of requests.')
+    parser.add_argument('--url', help='Base URL of a running server (IE: http://127.0.0.1:8000/v1). '
+                                      'Without it the app is built and called in this process.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads sending requests. (default: %(default)s)')
+    parser.add_argument('--requests', type=int, default=5000, help='Total requests to send. (default: %(default)s)')
+    parser.add_argument('--duration', type=float, help='Run for this many seconds instead of a number of requests.')
+    parser.add_argument('--token', help="Token header for '/login/protected'. In-process runs use an in-memory token "
+                                        "store when this is not given.")
+    parser.add_argument('--mix', help='Route weights as JSON. (default: %s)' % json.dumps(trafficMix))
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='Per client requests a second for in-process runs. Every thread is the same client so '
+                             'this is off unless given. (default: %(default)s)')
+    parser.add_argument('--seed', type=int, help='Seed for the request mix so runs send the same requests.')
+    parser.add_argument('--output', help='Write the report as JSON to this file.')
+    args = parser.parse_args(argv)
+
+    mix = json.loads(args.mix) if args.mix else dict(trafficMix)
+    token = args.token
+    if args.url:
+        if not token and mix.pop('protected', None):
+            print("No --token given so '/login/protected' is left out of the mix", file=sys.stderr)
+
+        def client_factory():
+            return HTTPClient(args.url, token)
+    else:
+        from FuturePathAPI.initApp import create_app
+        from FuturePathAPI.libs.RateLimit import rateLimiter
+        app = create_app(warm=True)
+        rateLimiter.configure(rate=args.rate_limit, burst=max(int(args.rate_limit * 2), 1), useRedis=False)
+        if not token:
+            token = use_in_memory_auth()
+
+        def client_factory():
+            return InProcessClient(app, token)
+
+    routes = [route for route in mix if route in trafficMix]
+    weights = numpy.asarray([mix[route] for route in routes], dtype=numpy.float64)
+    weights /= weights.sum()
+    report = run(client_factory, routes, weights, args.concurrency,
+                 requests=None if args.duration else args.requests, duration=args.duration, seed=args.seed)
+
+    header = f"{'route':<12}{'requests':>10}{'errors':>8}{'req/s':>10}" + \
+             ''.join(f"{f'p{p:g} ms':>11}" for p in percentiles)
+    print(header, file=sys.stderr)
+    for route, summary in report.items():
+        print(f"{route:<12}{summary['requests']:>10}{summary['errors']:>8}{summary['throughput']:>10.1f}" +
+              ''.join(f"{summary[f'p{p:g}'] or 0.0:>11.2f}" for p in percentiles), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'concurrency': args.concurrency, 'url': args.url, 'mix': mix, 'routes': report}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,12 +7,17 @@
 # Description:
 
 
+import os
 import multiprocessing
 
 workers = 1  # For development/testing
 # workers = multiprocessing.cpu_count() * 2 + 1
 bind = '127.0.0.1:8000'
-reload = True
+
+# The app is loaded once in the master and the warm caches are shared copy-on-write with every worker. Code changes
+# need a restart of the master so reload is off. Use run.py while developing.
+preload_app = True
+reload = False
 
 # For use with a UNIX socket instead of loopback address
 # bind = 'unix:flaskrest.sock'
@@ -21,3 +26,41 @@ reload = True
 # logging
 accesslog = '-'
 errorlog = '-'
+
+# Every worker writes its metrics to files in this directory so /metrics can report the totals of all of them. It has
+# to be set before the app is loaded. It is emptied in on_starting rather than here since the config is loaded again
+# on a reload (HUP) while workers are still writing to it.
+metricsDir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/d20FuturePathAPI_metrics')
+os.makedirs(metricsDir, exist_ok=True)
+
+
+def on_starting(server):
+    # Runs once in the master on a cold start. Files left by a previous run would otherwise be added to the totals.
+    for metricsFile in os.listdir(metricsDir):
+        if metricsFile.endswith('.db'):
+            os.remove(os.path.join(metricsDir, metricsFile))
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before any worker is forked.
+    from FuturePathAPI.Rolling import warm_caches
+    server.log.info(f'Warmed {warm_caches()} roll plans')
+
+
+def post_fork(server, worker):
+    # Every worker would otherwise roll the same numbers as its siblings and share the master's connections.
+    import numpy
+    from FuturePathAPI.libs.RandomGenerator import reseed
+    from FuturePathAPI.authentication import reset_connections
+    from FuturePathAPI.libs.RateLimit import rateLimiter
+    from FuturePathAPI.libs.Instrumentation import cacheSync
+    reseed()
+    numpy.random.seed()
+    reset_connections()
+    rateLimiter.reset()
+    cacheSync.reset()
+
+
+def child_exit(server, worker):
+    from FuturePathAPI.libs.Instrumentation import mark_process_dead
+    mark_process_dead(worker.pid)
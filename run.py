@@ -11,8 +11,10 @@ import sys
 sys.path.insert(0, '/var/www/api/FuturePathTest/')
 
 
-from FuturePathAPI import FuturePathMain
-from FuturePathAPI.initApp import app
+from FuturePathAPI.initApp import create_app
+
+
+app = create_app()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Shared pytest fixtures. Nothing here needs Mongo or Redis to be running.
+
+
+import threading
+import pytest
+
+
+class FakeRedis(object):
+    """ The sorted set and pipeline commands the token revocation list uses, kept in a dict. """
+
+    def __init__(self):
+        self.sets = {}
+        self._lock = threading.Lock()
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            self.sets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        with self._lock:
+            return [m.encode('utf-8') for m, score in self.sets.get(key, {}).items() if low <= score <= high]
+
+    def zremrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        with self._lock:
+            members = self.sets.get(key, {})
+            removed = [m for m, score in members.items() if low <= score <= high]
+            for m in removed:
+                del members[m]
+        return len(removed)
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline(object):
+    """ Queues calls to FakeRedis until execute() like redis.client.Pipeline. """
+
+    def __init__(self, server):
+        self.server = server
+        self.queued = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.queued.append((getattr(self.server, name), args, kwargs))
+            return self
+        return _queue
+
+    def execute(self):
+        return [func(*args, **kwargs) for func, args, kwargs in self.queued]
+
+    def reset(self):
+        self.queued = []
+
+
+@pytest.fixture
+def fakeRedis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def app():
+    from FuturePathAPI.initApp import create_app
+    from FuturePathAPI.libs.RateLimit import rateLimiter
+    rate = rateLimiter.rate
+    rateLimiter.configure(rate=0)
+    yield create_app()
+    rateLimiter.configure(rate=rate)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
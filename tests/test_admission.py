@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: CostBudget reservations and that the roll routes always give back what they reserve.
+
+
+import pytest
+from FuturePathAPI.libs.Admission import CostBudget, CostError, costBudget
+
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+STREAM_ROLL = {'dString': '2d6', 'modifier': '+1', 'diceOptions': {'repeatRoll': 25000}}
+
+
+def test_reserve_and_release():
+    budget = CostBudget(maxBuildCost=10, maxRequestCost=100, maxWorkerCost=150)
+    first = budget.reserve(100)
+    assert budget.inFlight == 100
+    with budget.reserve(50):
+        assert budget.inFlight == 150
+    assert budget.inFlight == 100
+    first.release()
+    first.release()
+    assert budget.inFlight == 0
+
+
+def test_over_request_cost_is_413():
+    budget = CostBudget(maxRequestCost=100)
+    with pytest.raises(CostError) as error:
+        budget.reserve(101)
+    assert error.value.status == 413
+    assert budget.inFlight == 0 and budget.rejected == 1
+
+
+def test_over_build_cost_is_422():
+    budget = CostBudget(maxBuildCost=10)
+    with pytest.raises(CostError) as error:
+        budget.check_build(11)
+    assert error.value.status == 422
+
+
+def test_busy_worker_is_503():
+    budget = CostBudget(maxRequestCost=100, maxWorkerCost=150)
+    with budget.reserve(100):
+        with pytest.raises(CostError) as error:
+            budget.reserve(60)
+        assert error.value.status == 503
+        assert budget.inFlight == 100
+    # On its own a request is let in so long as it is under maxRequestCost.
+    with budget.reserve(100):
+        pass
+    assert budget.inFlight == 0
+
+
+def test_json_roll_releases(client):
+    response = client.post('/tasks/roll', json={'dString': '4d6', 'dieOptions': {'dropLowest': 1}})
+    assert response.status_code == 200
+    assert costBudget.inFlight == 0
+
+
+def test_stream_holds_until_finished(client):
+    response = client.post('/tasks/roll', json=STREAM_ROLL, headers=NDJSON, buffered=False)
+    assert response.status_code == 200
+    assert costBudget.inFlight > 0
+    lines = response.get_data(as_text=True).splitlines()
+    response.close()
+    assert len(lines) == 25000
+    assert costBudget.inFlight == 0
+
+
+def test_stream_released_when_closed_early(client):
+    response = client.post('/tasks/roll', json=STREAM_ROLL, headers=NDJSON, buffered=False)
+    assert costBudget.inFlight > 0
+    next(response.response)
+    response.close()
+    assert costBudget.inFlight == 0
+
+
+def test_stream_released_when_never_read(client):
+    response = client.post('/tasks/roll', json=STREAM_ROLL, headers=NDJSON, buffered=False)
+    assert costBudget.inFlight > 0
+    response.close()
+    assert costBudget.inFlight == 0
+
+
+def test_busy_stream_is_503(client):
+    with costBudget.reserve(costBudget.maxRequestCost), costBudget.reserve(costBudget.maxRequestCost):
+        response = client.post('/tasks/roll', json=STREAM_ROLL, headers=NDJSON)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    assert costBudget.inFlight == 0
+
+
+def test_too_many_repeats_is_413(client):
+    response = client.post('/tasks/roll', json={'dString': 'd6', 'diceOptions': {'repeatRoll': 10 ** 9}},
+                           headers=NDJSON)
+    assert response.status_code == 413
+    assert costBudget.inFlight == 0
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Roll requests that can not be rolled get a JSON 400 that says what is wrong with them.
+
+
+import pytest
+
+
+def _assert_bad(response, text):
+    assert response.status_code == 400
+    assert text in response.get_json()['error']
+
+
+@pytest.mark.parametrize('query, text', [
+    ('seed=-1', 'seed'),
+    ('seed=x', 'seed'),
+    ('dropLowest=abc', 'dropLowest'),
+    ('keepHighest=1.5', 'keepHighest'),
+])
+def test_bad_get_options(client, query, text):
+    _assert_bad(client.get(f'/tasks/roll/4d6?{query}'), text)
+
+
+@pytest.mark.parametrize('roll, text', [
+    ({'dString': 'd20', 'seed': 'x'}, 'seed'),
+    ({'dString': 'd20', 'seed': -1}, 'seed'),
+    ({'dString': 'd20', 'diceOptions': {'repeatRoll': 'abc'}}, 'repeatRoll'),
+    ({'dString': 'd20', 'diceOptions': {'repeatRoll': -2}}, 'repeatRoll'),
+    ({'dString': '4d6', 'dieOptions': {'dropLowest': 'abc'}}, 'dropLowest'),
+])
+def test_bad_json_options(client, roll, text):
+    _assert_bad(client.post('/tasks/roll', json=roll), text)
+
+
+def test_repeat_roll_still_accepts_ints(client):
+    for repeatRoll, count in ((3, 3), ('3', 3), (True, 1), (0, 1)):
+        response = client.post('/tasks/roll', json={'dString': 'd20', 'diceOptions': {'repeatRoll': repeatRoll}})
+        assert response.status_code == 200
+        assert len(response.get_json()['Rolls']) == count
+
+
+@pytest.mark.parametrize('percentiles', ['nan', 'inf', '-inf', '-1', '100.5', 'abc'])
+def test_bad_percentiles(client, percentiles):
+    response = client.get(f'/tasks/probability/2d6?percentiles=50,{percentiles}')
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+
+def test_percentiles_at_the_edges(client):
+    response = client.get('/tasks/probability/2d6?percentiles=0,100')
+    assert response.status_code == 200
+    assert response.get_json()['Percentiles'] == {'0': 2, '100': 12}
+
+
+def test_stream_with_drop_lowest(client):
+    roll = {'dString': '4d6', 'diceOptions': {'repeatRoll': 6, 'dropLowest': 1}}
+    response = client.post('/tasks/roll', json=roll, headers={'Accept': 'application/x-ndjson'})
+    _assert_bad(response, 'dropLowest')
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: keep_sum against every possible roll and the alias table never picking an impossible face.
+
+
+import itertools
+from collections import Counter
+import numpy
+import pytest
+from FuturePathAPI.libs.Distribution import Distribution, keep_sum
+
+
+def brute_force(faces, count, low, high):
+    """ The odds of every kept total found by listing every roll of 'count' dice with 'faces'. """
+    totals = Counter()
+    for roll in itertools.product(faces, repeat=count):
+        totals[sum(sorted(roll)[low:count - high])] += 1
+    rolls = len(faces) ** count
+    return {total: times / rolls for total, times in totals.items()}
+
+
+@pytest.mark.parametrize('faces, count, low, high', [
+    (range(1, 7), 4, 1, 0),
+    (range(1, 7), 4, 0, 1),
+    (range(1, 7), 3, 1, 1),
+    (range(1, 5), 5, 2, 1),
+    (range(1, 21), 2, 1, 0),
+    (range(1, 21), 2, 0, 1),
+    ((1, 2, 2, 5), 4, 1, 1),
+    ((2, 3, 4, 5, 6), 3, 0, 0),
+    ((-2, 0, 3), 4, 1, 2),
+])
+def test_keep_sum_matches_brute_force(faces, count, low, high):
+    result = keep_sum(Distribution.from_faces(faces), count, low, high)
+    expected = brute_force(tuple(faces), count, low, high)
+    assert result.probabilities.sum() == pytest.approx(1.0)
+    for value, prob in zip(result.values.tolist(), result.probabilities.tolist()):
+        assert prob == pytest.approx(expected.get(value, 0.0), abs=1e-12)
+
+
+def test_keep_sum_drops_every_die():
+    with pytest.raises(Exception):
+        keep_sum(Distribution.from_faces(range(1, 7)), 2, 1, 1)
+
+
+# Faces with a probability of 0 between the ones that can be rolled, IE: a d10 with rerollDie=[1, 5, 10].
+GAPPED = Distribution.from_faces((2, 3, 4, 6, 7, 8, 9))
+SKEWED = Distribution(0, numpy.array([0.0, 1e-6, 0.0, 0.5, 0.0, 0.499999, 0.0]))
+
+
+@pytest.mark.parametrize('distribution', [GAPPED, SKEWED, keep_sum(GAPPED, 3, 1, 0)])
+def test_sample_never_returns_impossible_faces(distribution):
+    possible = set(distribution.values[distribution.probabilities > 0].tolist())
+    assert set(distribution.sample(200000).tolist()) <= possible
+
+
+@pytest.mark.parametrize('distribution', [GAPPED, SKEWED])
+def test_draw_never_returns_impossible_faces(distribution):
+    possible = set(distribution.values[distribution.probabilities > 0].tolist())
+    assert {distribution.draw() for _ in range(50000)} <= possible
+
+
+def test_sample_follows_probabilities():
+    counts = numpy.bincount(GAPPED.sample(700000) - GAPPED.offset, minlength=len(GAPPED))
+    assert counts / counts.sum() == pytest.approx(GAPPED.probabilities, abs=0.005)
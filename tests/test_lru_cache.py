@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: LRUCache limits and Memorizer computing each missing value once and sharing its errors.
+
+
+import time
+import threading
+import pytest
+from FuturePathAPI.libs.LRUCache import LRUCache
+from FuturePathAPI.libs.Instrumentation import cacheSync
+from FuturePathAPI.Rolling import Memorizer
+
+
+class Sized(object):
+
+    def __init__(self, cachedBytes):
+        self.cachedBytes = cachedBytes
+
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(maxSize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_limit():
+    cache = LRUCache(maxSize=10, maxBytes=100)
+    cache.set('a', Sized(60))
+    cache.set('b', Sized(30))
+    assert cache.bytes == 90
+    cache.set('c', Sized(30))
+    assert 'a' not in cache and len(cache) == 2
+    assert cache.bytes == 60
+
+
+def test_ttl_expires():
+    cache = LRUCache(ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_peek_and_reset_stats():
+    cache = LRUCache()
+    cache.set('a', 1)
+    assert cache.peek('a') == 1
+    assert cache.stats()['hits'] == 0
+    cache.get('a')
+    cache.get('b')
+    cache.reset_stats()
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (0, 0, 1)
+
+
+@pytest.fixture
+def memorize():
+    """ Wrap functions in a Memorizer and take them out of Memorizer.instances and cacheSync afterwards. """
+    made = []
+
+    def _memorize(func, **kwargs):
+        memorizer = Memorizer(func, **kwargs)
+        made.append(memorizer.name)
+        return memorizer
+
+    yield _memorize
+    for name in made:
+        Memorizer.instances.pop(name, None)
+        cacheSync.caches.pop(name, None)
+
+
+def run_together(func, count):
+    """ Call func() on 'count' threads at once. Returns what each returned or raised. """
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def _run(index):
+        start.wait()
+        try:
+            results[index] = func()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=_run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_memorizer_caches(memorize):
+    calls = []
+
+    def _test_memorizer_caches(x, y=1):
+        calls.append((x, y))
+        return x + y
+
+    cached = memorize(_test_memorizer_caches)
+    assert cached(1, y=2) == 3
+    assert cached(1, y=2) == 3
+    assert cached(1) == 2
+    assert calls == [(1, 2), (1, 1)]
+    assert cached.stats()['size'] == 2
+
+
+def test_memorizer_single_flight(memorize):
+    calls = []
+    release = threading.Event()
+
+    def _test_memorizer_single_flight(x):
+        calls.append(x)
+        release.wait(5)
+        return [x]
+
+    cached = memorize(_test_memorizer_single_flight)
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = run_together(lambda: cached(4), 8)
+    timer.cancel()
+    assert calls == [4]
+    assert all(result == [4] for result in results)
+    # Every caller gets the very same object.
+    assert all(result is results[0] for result in results)
+    assert cached.stats()['waits'] >= 1
+    assert cached.stats()['inFlight'] == 0
+
+
+def test_memorizer_shares_errors(memorize):
+    calls = []
+    release = threading.Event()
+
+    def _test_memorizer_shares_errors(x):
+        calls.append(x)
+        release.wait(5)
+        raise ValueError(f'bad {x}')
+
+    cached = memorize(_test_memorizer_shares_errors)
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = run_together(lambda: cached(5), 6)
+    timer.cancel()
+    assert calls == [5]
+    assert all(type(result) is ValueError and str(result) == 'bad 5' for result in results)
+    # A failure is not cached so the next call tries again.
+    with pytest.raises(ValueError):
+        cached(5)
+    assert calls == [5, 5]
+    assert cached.stats()['inFlight'] == 0
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: seeded() gives the same rolls for the same seed and leaves the thread's own generator alone.
+
+
+from FuturePathAPI.libs.RandomGenerator import get_generator, seeded
+from FuturePathAPI.Rolling import DieAnalyzer
+
+
+ROLL = {'dice': [{'id': 1, 'dString': '4d6', 'dieOptions': {'dropLowest': 1}, 'connectorString': '+'},
+                 {'id': 2, 'dString': 'd20', 'modifier': '+2'}],
+        'diceOptions': {'repeatRoll': 50}}
+
+
+def test_same_seed_same_numbers():
+    with seeded(7) as generator:
+        first = generator.random(20).tolist()
+    with seeded(7):
+        second = get_generator().random(20).tolist()
+    assert first == second
+
+
+def test_different_seed_different_numbers():
+    with seeded(7):
+        first = get_generator().random(20).tolist()
+    with seeded(8):
+        second = get_generator().random(20).tolist()
+    assert first != second
+
+
+def test_seeded_restores_thread_generator():
+    generator = get_generator()
+    with seeded(3) as inner:
+        assert inner is not generator
+        assert get_generator() is inner
+    assert get_generator() is generator
+
+
+def test_seed_none_uses_thread_generator():
+    generator = get_generator()
+    with seeded(None) as inner:
+        assert inner is generator
+
+
+def test_seeded_plan_rolls_repeat():
+    plan = DieAnalyzer.compile_json(ROLL)
+    with seeded(42):
+        first = plan.roll()
+    with seeded(42):
+        second = plan.roll()
+    assert first == second
+
+
+def test_seeded_post_repeats(client):
+    first = client.post('/tasks/roll', json={**ROLL, 'seed': 1234})
+    second = client.post('/tasks/roll', json={**ROLL, 'seed': 1234})
+    assert first.status_code == 200
+    assert first.get_json() == second.get_json()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Token buckets kept in process and RateLimiter falling back to them when Redis is down.
+
+
+import pytest
+from FuturePathAPI.libs import RateLimit
+from FuturePathAPI.libs.RateLimit import LocalBuckets, RateLimiter
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def limiter(app, monkeypatch):
+    """ An in process RateLimiter for the app that allows a burst of 2 and hardly refills. """
+    limiter = RateLimiter(rate=0.001, burst=2, useRedis=False)
+    monkeypatch.setattr(RateLimit, 'rateLimiter', limiter)
+    return limiter
+
+
+def test_burst_then_limited(clock):
+    buckets = LocalBuckets(clock=clock)
+    decisions = [buckets.take('ip:1', rate=2.0, burst=5) for _ in range(6)]
+    assert [d.allowed for d in decisions] == [True] * 5 + [False]
+    assert decisions[4].remaining == 0
+    assert decisions[5].retryAfter == pytest.approx(0.5)
+    headers = decisions[5].headers()
+    assert headers['Retry-After'] == '1' and headers['RateLimit-Limit'] == '5'
+
+
+def test_tokens_come_back_over_time(clock):
+    buckets = LocalBuckets(clock=clock)
+    for _ in range(5):
+        buckets.take('ip:1', rate=2.0, burst=5)
+    assert not buckets.take('ip:1', rate=2.0, burst=5).allowed
+    clock.now += 1.0
+    assert buckets.take('ip:1', rate=2.0, burst=5).allowed
+    assert buckets.take('ip:1', rate=2.0, burst=5).allowed
+    assert not buckets.take('ip:1', rate=2.0, burst=5).allowed
+    # Never more than 'burst' however long the client waits.
+    clock.now += 3600.0
+    assert buckets.take('ip:1', rate=2.0, burst=5).remaining == 4
+
+
+def test_clients_are_separate(clock):
+    buckets = LocalBuckets(clock=clock)
+    for _ in range(3):
+        buckets.take('user:a', rate=1.0, burst=3)
+    assert not buckets.take('user:a', rate=1.0, burst=3).allowed
+    assert buckets.take('user:b', rate=1.0, burst=3).allowed
+
+
+def test_cost_takes_several_tokens(clock):
+    buckets = LocalBuckets(clock=clock)
+    assert buckets.take('ip:1', rate=1.0, burst=10, cost=8).allowed
+    decision = buckets.take('ip:1', rate=1.0, burst=10, cost=8)
+    assert not decision.allowed
+    assert decision.retryAfter == pytest.approx(6.0)
+
+
+def test_limiter_without_redis():
+    limiter = RateLimiter(rate=1.0, burst=2, useRedis=False)
+    assert [limiter.take('ip:1').allowed for _ in range(3)] == [True, True, False]
+    assert limiter.limited == 1
+    limiter.reset()
+    assert limiter.take('ip:1').allowed
+
+
+def test_limiter_falls_back_when_redis_fails():
+    calls = []
+
+    def _broken_redis():
+        calls.append(1)
+        raise ConnectionError('Redis is down')
+
+    limiter = RateLimiter(rate=1.0, burst=2, getRedis=_broken_redis)
+    assert [limiter.take('ip:1').allowed for _ in range(3)] == [True, True, False]
+    # Redis is not asked again until redisRetryDelay has passed.
+    assert len(calls) == 1
+
+
+def test_zero_rate_is_disabled():
+    assert not RateLimiter(rate=0, useRedis=False).enabled
+
+
+def test_clients_behind_the_proxy_are_separate(client, limiter):
+    def _roll(address):
+        return client.get('/tasks/roll/d6', headers={'X-Forwarded-For': address}).status_code
+
+    assert [_roll('203.0.113.1') for _ in range(3)] == [200, 200, 429]
+    assert _roll('203.0.113.2') == 200
+    # Only the entry added by the trusted proxy counts so a client can not pick its own address.
+    assert _roll('198.51.100.7, 203.0.113.1') == 429
+
+
+def test_batch_costs_one_token_per_roll(client, limiter):
+    limiter.burst = 3
+
+    def _batch(count):
+        return client.post('/tasks/roll/batch', json={'rolls': [{'dString': 'd6'}] * count}).status_code
+
+    assert _batch(2) == 200
+    assert _batch(2) == 429
+    assert _batch(1) == 200
+    # A batch bigger than the burst empties the bucket rather than never being allowed.
+    limiter.local.clear()
+    assert _batch(10) == 200
+    assert _batch(1) == 429
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding=utf-8 -*-
+
+# Author: Ryan Henrichson
+# Version: 0.1
+# Date: 10/18/2026
+# Description: Signed tokens and revoking them through the Redis revocation list.
+
+
+import time
+import threading
+import pytest
+from FuturePathAPI.libs import Tokens
+from FuturePathAPI.libs.Tokens import RevocationList, issue_token, verify_token, revoke_token, token_claims
+
+
+@pytest.fixture
+def revocationList(fakeRedis, monkeypatch):
+    """ Tokens.revocationList backed by FakeRedis. refreshInterval is huge so only refresh() reloads it. """
+    revocations = RevocationList(refreshInterval=3600.0, getRedis=lambda: fakeRedis)
+    revocations.refresh()
+    monkeypatch.setattr(Tokens, 'revocationList', revocations)
+    return revocations
+
+
+def test_issue_and_verify(revocationList):
+    token = issue_token('someone')
+    assert verify_token(token) == 'someone'
+    claims = token_claims(token)
+    assert claims['u'] == 'someone'
+    assert claims['e'] > time.time()
+    assert issue_token('someone') != token
+
+
+def test_bad_tokens(revocationList):
+    token = issue_token('someone')
+    assert verify_token(None) is None
+    assert verify_token('') is None
+    assert verify_token(token[:-2]) is None
+    assert verify_token(token + 'x') is None
+
+
+def test_expired_token(revocationList, monkeypatch):
+    token = issue_token('someone', expire=60)
+    monkeypatch.setattr(Tokens.time, 'time', lambda: time.monotonic() + 10 ** 10)
+    assert verify_token(token) is None
+
+
+def test_revoke(revocationList, fakeRedis):
+    token = issue_token('someone')
+    other = issue_token('someone')
+    assert revoke_token(token)
+    assert verify_token(token) is None
+    assert verify_token(other) == 'someone'
+    # The id is in Redis until the token would have expired so other workers see it too.
+    tokenId = Tokens.serializer.loads(token)['j']
+    assert fakeRedis.sets[Tokens.REVOKED_KEY][tokenId] == token_claims(other)['e']
+    # A token can only be revoked once.
+    assert not revoke_token(token)
+
+
+def test_logout_forgets_the_stored_token(revocationList, client, monkeypatch):
+    from FuturePathAPI import authentication
+    cleared = []
+
+    class _Users(object):
+        def clearToken(self, username, token):
+            cleared.append((username, token))
+            return True
+
+    monkeypatch.setattr(authentication, 'um', _Users())
+    token = issue_token('someone')
+    response = client.post('/logout', headers={'Token': token})
+    assert response.status_code == 200
+    assert verify_token(token) is None
+    # Login hands back the stored token while it is good so logout has to clear it.
+    assert cleared == [('someone', token)]
+    assert client.post('/logout', headers={'Token': token}).status_code == 401
+
+
+def test_logout_without_mongo(revocationList, client, monkeypatch):
+    from FuturePathAPI import authentication
+
+    class _Users(object):
+        def clearToken(self, username, token):
+            raise ConnectionError('Mongo is down')
+
+    monkeypatch.setattr(authentication, 'um', _Users())
+    token = issue_token('someone')
+    assert client.post('/logout', headers={'Token': token}).status_code == 200
+    assert verify_token(token) is None
+
+
+def test_revoked_in_another_worker(revocationList, fakeRedis):
+    token = issue_token('someone')
+    other = RevocationList(refreshInterval=3600.0, getRedis=lambda: fakeRedis)
+    other.revoke(Tokens.serializer.loads(token)['j'], time.time() + 60)
+    assert verify_token(token) == 'someone'
+    revocationList.refresh()
+    assert verify_token(token) is None
+
+
+def test_refresh_keeps_list_when_redis_fails(fakeRedis):
+    revocations = RevocationList(refreshInterval=3600.0, getRedis=lambda: fakeRedis)
+    revocations.revoke('abc', time.time() + 60)
+    revocations.getRedis = lambda: None
+    revocations.refresh()
+    assert 'abc' in revocations
+
+
+def test_first_check_waits_for_redis(fakeRedis):
+    fakeRedis.zadd(Tokens.REVOKED_KEY, {'abc': time.time() + 60})
+    revocations = RevocationList(refreshInterval=3600.0, getRedis=lambda: fakeRedis)
+    # A new worker has no copy yet so the first check loads one rather than answering from an empty list.
+    assert 'abc' in revocations
+    assert revocations.loaded
+    # The same goes for a forked worker.
+    revocations.reset()
+    assert 'abc' in revocations
+
+
+def test_first_check_retries_when_redis_fails(fakeRedis, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Tokens.time, 'monotonic', lambda: now[0])
+    fakeRedis.zadd(Tokens.REVOKED_KEY, {'abc': time.time() + 60})
+    calls = []
+
+    def _down():
+        calls.append(1)
+        raise ConnectionError('Redis is down')
+
+    revocations = RevocationList(refreshInterval=5.0, getRedis=_down)
+    assert 'abc' not in revocations
+    # Redis is only tried once an interval while it is down.
+    assert 'abc' not in revocations
+    assert len(calls) == 1
+    revocations.getRedis = lambda: fakeRedis
+    now[0] += 5.0
+    assert 'abc' in revocations
+    assert revocations.loaded
+
+
+def test_check_does_not_wait_for_redis(fakeRedis):
+    reached = threading.Event()
+    release = threading.Event()
+    slow = [False]
+
+    def _redis():
+        if slow[0]:
+            reached.set()
+            release.wait(5)
+        return fakeRedis
+
+    revocations = RevocationList(refreshInterval=0.0, getRedis=_redis)
+    assert 'abc' not in revocations
+    slow[0] = True
+    fakeRedis.zadd(Tokens.REVOKED_KEY, {'abc': time.time() + 60})
+    # Once loaded a check starts a reload on a thread and answers from the copy it has while Redis is slow.
+    start = time.monotonic()
+    assert 'abc' not in revocations
+    assert reached.wait(5)
+    assert 'abc' not in revocations
+    assert time.monotonic() - start < 1
+    release.set()
+    deadline = time.monotonic() + 5
+    while 'abc' not in revocations.revoked and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert 'abc' in revocations